@@ -0,0 +1,172 @@
+"""
+Stress test for concurrent writers.
+
+Starts several processes that each add expenses through the CLI's add command, while
+another process keeps updating expenses and compacting the ledger. Then checks that every
+expense was saved exactly once with a unique ID, and that the rollup matches the ledger.
+Reports the add throughput and how many fsyncs the writers shared. Exits with status 1
+if a check fails.
+
+    python benchmarks/concurrent_writers.py
+    python benchmarks/concurrent_writers.py --processes 32 --adds 100 --storage partitioned
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+
+def _load_cli(workdir):
+    os.chdir(workdir)
+    sys.path.insert(0, str(SRC_DIR))
+    from styles.colors import console
+    console.file = io.StringIO()
+    import cli
+    return cli.cli
+
+
+def _commits():
+    from utils import data_manager
+    group_commit = getattr(data_manager, "_group_commit", None)
+    return group_commit.commits if group_commit is not None else 0
+
+
+def add_worker(workdir, worker, adds, start_event, results):
+    cli = _load_cli(workdir)
+    start_event.wait()
+    for number in range(adds):
+        cli.main(
+            ["add", "--amount", f"{(worker * adds + number) % 500 + 1}.25", "--category", "Others",
+             "--date", f"2025-{number % 12 + 1:02d}-{worker % 28 + 1:02d}", "--description", f"w{worker} n{number}"],
+            standalone_mode=False
+        )
+    results.put(("commits", _commits()))
+
+
+def maintenance_worker(workdir, start_event, done_event, results):
+    """
+    Updates random expenses and compacts the ledger until the writers are done. Updates move
+    expenses between 2024 and 2025, so partitioned ledgers also move them between partitions
+    and back.
+    """
+    cli = _load_cli(workdir)
+    from utils.data_manager import get_next_expense_id
+    start_event.wait()
+    updates = compactions = 0
+    while not done_event.is_set():
+        last_id = get_next_expense_id() - 1
+        if last_id > 0:
+            cli.main(
+                ["update", "--id", str(random.randint(1, last_id)), "--amount", "1.00",
+                 "--date", f"{random.choice((2024, 2025))}-06-15"],
+                standalone_mode=False
+            )
+            updates += 1
+        if updates % 10 == 0:
+            cli.main(["compact"], standalone_mode=False)
+            compactions += 1
+    results.put(("maintenance", (updates, compactions)))
+
+
+def check_ledger(workdir, processes, adds):
+    """
+    Returns a list of the problems found in the ledger (empty if there are none).
+    """
+    os.chdir(workdir)
+    sys.path.insert(0, str(SRC_DIR))
+    from utils.data_manager import iter_expenses, read_ledger_meta, get_storage, _summarize_rollup
+
+    problems = []
+    expenses = list(iter_expenses())
+    ids = [expense["ID"] for expense in expenses]
+    if len(ids) != len(set(ids)):
+        problems.append(f"{len(ids) - len(set(ids))} duplicate IDs")
+
+    descriptions = [expense["Description"] for expense in expenses]
+    expected = {f"w{worker} n{number}" for worker in range(processes) for number in range(adds)}
+    missing = expected - set(descriptions)
+    if missing:
+        problems.append(f"{len(missing)} expenses lost (e.g., {sorted(missing)[:3]})")
+    if len(descriptions) != len(set(descriptions)):
+        problems.append(f"{len(descriptions) - len(set(descriptions))} expenses saved twice")
+
+    # The rollup kept by the writers must match a fresh aggregation of the ledger
+    _, rollup = get_storage().rollup()
+    if _summarize_rollup(read_ledger_meta()["rollup"]) != _summarize_rollup(rollup):
+        problems.append("the rollup doesn't match the ledger")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks that concurrent writers don't lose or duplicate expenses.")
+    parser.add_argument("--processes", type=int, default=16, help="Number of processes adding expenses.")
+    parser.add_argument("--adds", type=int, default=50, help="Expenses added by each process.")
+    parser.add_argument("--storage", default="csv", help="Storage format of the ledger (csv, columnar, sqlite or partitioned).")
+    parser.add_argument("--dir", help="Working directory for the ledger (default: a new temporary directory).")
+    args = parser.parse_args()
+
+    workdir = Path(args.dir or tempfile.mkdtemp(prefix="expense_tracker_stress_")).resolve()
+    workdir.mkdir(parents=True, exist_ok=True)
+    if args.storage != "csv":
+        setup = multiprocessing.Process(target=_migrate, args=(workdir, args.storage))
+        setup.start()
+        setup.join()
+
+    start_event, done_event = multiprocessing.Event(), multiprocessing.Event()
+    results = multiprocessing.Queue()
+    writers = [
+        multiprocessing.Process(target=add_worker, args=(workdir, worker, args.adds, start_event, results))
+        for worker in range(args.processes)
+    ]
+    maintenance = multiprocessing.Process(target=maintenance_worker, args=(workdir, start_event, done_event, results))
+    for process in writers + [maintenance]:
+        process.start()
+
+    # Let every process finish importing before starting the clock
+    time.sleep(2)
+    started = time.perf_counter()
+    start_event.set()
+    for process in writers:
+        process.join()
+    elapsed = time.perf_counter() - started
+    done_event.set()
+    maintenance.join()
+
+    commits, maintenance_counts = 0, (0, 0)
+    while not results.empty():
+        kind, value = results.get()
+        if kind == "commits":
+            commits += value
+        else:
+            maintenance_counts = value
+
+    total = args.processes * args.adds
+    print(f"Ledger: {workdir} ({args.storage})")
+    print(f"{total} adds from {args.processes} processes in {elapsed:.2f} s: {total / elapsed:.0f} adds/s")
+    print(f"Concurrent updates: {maintenance_counts[0]}, compactions: {maintenance_counts[1]}")
+    print(f"fsync rounds by the writers: {commits} for {total} adds")
+
+    with multiprocessing.Pool(1) as pool:
+        problems = pool.apply(check_ledger, (workdir, args.processes, args.adds))
+    if problems:
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        sys.exit(1)
+    print("OK: every expense was saved once, with a unique ID")
+
+
+def _migrate(workdir, storage):
+    cli = _load_cli(workdir)
+    cli.main(["migrate", "--to", storage], standalone_mode=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark for the parallel rollup of large CSV ledgers.
+
+Writes a CSV ledger (with quoted multi-line descriptions, invalid rows and a journal of
+updates and deletions), aggregates it with a serial scan through the csv module and then
+with the byte scanner for an increasing number of workers (1 worker scans in the calling
+process), and reports the time and speedup of each. Exits with status 1 if a result
+differs from the serial one.
+
+    python benchmarks/parallel_rollup.py
+    python benchmarks/parallel_rollup.py --rows 5000000 --workers 1 2 4 8
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils.data_manager import FIELD_NAMES, CsvStorage, ExpenseStorage, _append_journal, _read_journal  # noqa: E402
+from utils.parallel_scan import parallel_rollup  # noqa: E402
+
+
+CATEGORIES = ["Food", "Transport", "Entertainment", "Utilities", "Health", "Education", "Others", "food"]
+
+
+def write_ledger(path, rows: int, seed: int = 1):
+    """
+    Writes a CSV ledger and a journal that updates and deletes some of its expenses.
+    """
+    generator = random.Random(seed)
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELD_NAMES)
+        for expense_id in range(1, rows + 1):
+            description = f"Expense {expense_id}"
+            if expense_id % 1000 == 0:
+                description = f"Split, over\n{expense_id},2024-01-01,1.00,Food,lines"
+            expense_date = f"{generator.randint(2015, 2025)}-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}"
+            if expense_id % 5000 == 0:
+                expense_date = "not a date"
+            writer.writerow([expense_id, expense_date, f"{generator.randint(1, 50000) / 100:.2f}", generator.choice(CATEGORIES), description])
+
+    journal_path = path.with_name(f"{path.stem}_journal.csv")
+    for expense_id in generator.sample(range(1, rows + 1), min(rows, 200)):
+        if expense_id % 2:
+            _append_journal("D", {"ID": str(expense_id)}, journal_path)
+        else:
+            _append_journal("U", {"ID": str(expense_id), "Date": "2020-02-02", "Amount": "9.99", "Category": "Health", "Description": "Edited"}, journal_path)
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the serial and the parallel rollup of a CSV ledger.")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Number of expenses in the generated ledger.")
+    parser.add_argument("--workers", type=int, nargs="+", help="Worker counts to try (default: 1, 2, 4, ... up to the number of CPUs).")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    worker_counts = args.workers or sorted({1, *(2 ** power for power in range(1, cpus.bit_length()) if 2 ** power <= cpus), cpus})
+
+    with tempfile.TemporaryDirectory(prefix="expense_tracker_rollup_") as directory:
+        storage = CsvStorage(Path(directory) / "expenses.csv")
+        write_ledger(storage.csv_path, args.rows)
+        size_mb = storage.csv_path.stat().st_size / 1024 / 1024
+        print(f"Ledger: {args.rows} expenses, {size_mb:.0f} MB, {cpus} CPUs")
+
+        serial_time, expected = timed(lambda: ExpenseStorage.rollup(storage))
+        print(f"  csv module scan   {serial_time:7.2f} s")
+
+        failed = False
+        changes = _read_journal(storage.journal_path)
+        for workers in worker_counts:
+            elapsed, result = timed(lambda: parallel_rollup(storage.csv_path, changes, workers))
+            matches = json.dumps(result) == json.dumps(expected)
+            failed = failed or not matches
+            print(f"  {workers:2d} worker(s)      {elapsed:7.2f} s  {serial_time / elapsed:5.2f}x  {'same result' if matches else 'DIFFERENT RESULT'}")
+
+    if failed:
+        print("FAIL: the parallel rollup doesn't match the serial scan.")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
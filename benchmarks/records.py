@@ -0,0 +1,116 @@
+"""
+Benchmark for loading the ledger as dictionaries of strings or as typed Expense records.
+
+Writes a CSV ledger, loads it with the CSV storage both ways (iter_expenses() for
+dictionaries, query_records() for records) and reports, for each, the memory retained by
+the loaded rows and the peak while loading (measured with tracemalloc), the load time,
+and the time of a pass that filters on amount, ID and month. Exits with status 1 if both
+ways don't load the same expenses.
+
+    python benchmarks/records.py
+    python benchmarks/records.py --rows 1000000 --runs 5
+"""
+import argparse
+import csv
+import gc
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils import records  # noqa: E402
+from utils.data_manager import FIELD_NAMES, CsvStorage  # noqa: E402
+from utils.query_engine import ExpenseQuery  # noqa: E402
+
+
+CATEGORIES = ["Groceries", "Leisure", "Electronics", "Utilities", "Clothing", "Health", "Others"]
+
+
+def write_ledger(path, rows: int, seed: int = 1):
+    generator = random.Random(seed)
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(FIELD_NAMES)
+        for expense_id in range(1, rows + 1):
+            expense_date = f"{generator.randint(2015, 2025)}-{generator.randint(1, 12):02d}-{generator.randint(1, 28):02d}"
+            writer.writerow([expense_id, expense_date, f"{generator.randint(1, 50000) / 100:.2f}", generator.choice(CATEGORIES), f"Expense {expense_id}"])
+
+
+def load_dicts(storage):
+    return list(storage.iter_expenses())
+
+
+def load_records(storage):
+    # Start without the dates shared by earlier loads, so they are counted in this one
+    records._date_cache.clear()
+    return list(storage.query_records(ExpenseQuery()))
+
+
+def filter_dicts(rows):
+    return sum(1 for row in rows if float(row["Amount"]) >= 250 and int(row["ID"]) % 2 == 0 and row["Date"][5:7] == "06")
+
+
+def filter_records(rows):
+    return sum(1 for record in rows if record.cents >= 25000 and record.id % 2 == 0 and record.date.month == 6)
+
+
+def measure_memory(load, storage):
+    """
+    Returns (retained bytes, peak bytes) of loading the ledger.
+    """
+    gc.collect()
+    tracemalloc.start()
+    rows = load(storage)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return retained, peak
+
+
+def median_time(function, runs: int):
+    times = []
+    for _ in range(runs):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares the memory and load time of dictionary rows and Expense records.")
+    parser.add_argument("--rows", type=int, default=200_000, help="Number of expenses in the ledger.")
+    parser.add_argument("--runs", type=int, default=3, help="Runs of each timing (the median is reported).")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="expense_tracker_records_") as directory:
+        path = Path(directory) / "expenses.csv"
+        write_ledger(path, args.rows)
+        storage = CsvStorage(path)
+        print(f"Ledger: {args.rows} expenses, {path.stat().st_size / 1024 / 1024:.1f} MB")
+
+        dicts, typed = load_dicts(storage), load_records(storage)
+        if [record.to_row() for record in typed] != dicts:
+            print("FAIL: the records don't match the dictionaries")
+            sys.exit(1)
+
+        print(f"{'':10} {'retained':>12} {'peak':>12} {'load':>9} {'filter':>9}")
+        for name, load, filter_rows, rows in [("dicts", load_dicts, filter_dicts, dicts), ("records", load_records, filter_records, typed)]:
+            retained, peak = measure_memory(load, storage)
+            load_time = median_time(lambda: load(storage), args.runs)
+            filter_time = median_time(lambda: filter_rows(rows), args.runs)
+            print(
+                f"{name:10} {retained / args.rows:8.0f} B/row {peak / 1024 / 1024:9.1f} MB "
+                f"{load_time:8.2f}s {filter_time:8.3f}s"
+            )
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
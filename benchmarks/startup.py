@@ -0,0 +1,94 @@
+"""
+Startup benchmark for the CLI.
+
+Runs a command (by default 'add --help') several times with 'python -X importtime',
+reports the median time spent importing modules, the median wall time and the slowest
+top-level imports, and exits with status 1 if the median import time goes over the budget.
+
+Import times depend a lot on the machine, so the budget applies to the time spent beyond
+importing click and rich.console, which every command needs and which is measured in the
+same way before the command.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --budget-ms 40 --runs 10 -- list --help
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+CLI_PATH = Path(__file__).resolve().parent.parent / "src" / "cli.py"
+# Imports of the CLI's own code, beyond BASELINE_MODULES (about 40 ms for 'add --help')
+DEFAULT_BUDGET_MS = 60
+
+# Imported by every command before any of the CLI's own code does something
+BASELINE_MODULES = ["click", "rich.console"]
+
+
+def parse_importtime(stderr: str):
+    """
+    Returns {module: cumulative µs} for the top-level imports in the output of -X importtime.
+    Nested imports are already included in the cumulative time of their top-level import.
+    """
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not name.startswith("  "):
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def run_once(command):
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *command],
+        capture_output=True, text=True, check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    return wall_ms, parse_importtime(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks the import time of a CLI command against a budget.")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="Maximum median import time beyond click and rich.console, in milliseconds.")
+    parser.add_argument("--runs", type=int, default=9, help="Number of runs (the first one warms up the bytecode cache).")
+    parser.add_argument("command", nargs="*", default=["add", "--help"], help="CLI arguments to run (default: add --help).")
+    args = parser.parse_args()
+
+    command = [str(CLI_PATH), *args.command]
+    baseline = ["-c", f"import {', '.join(BASELINE_MODULES)}"]
+    run_once(command)
+    run_once(baseline)
+    # Alternate the runs, so a slower stretch of the machine weighs on both
+    runs, baseline_runs = [], []
+    for _ in range(args.runs):
+        runs.append(run_once(command))
+        baseline_runs.append(run_once(baseline))
+    import_ms = statistics.median(sum(modules.values()) / 1000 for _, modules in runs)
+    baseline_ms = statistics.median(sum(modules.values()) / 1000 for _, modules in baseline_runs)
+    own_ms = import_ms - baseline_ms
+    wall_ms = statistics.median(wall for wall, _ in runs)
+
+    slowest = sorted(runs[-1][1].items(), key=lambda item: item[1], reverse=True)[:8]
+    print(f"Command: cli.py {' '.join(args.command)}")
+    print(f"Median import time: {import_ms:.1f} ms ({', '.join(BASELINE_MODULES)}: {baseline_ms:.1f} ms)")
+    print(f"Beyond them:        {own_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"Median wall time:   {wall_ms:.1f} ms")
+    print("Slowest top-level imports:")
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:7.1f} ms  {name}")
+
+    if own_ms > args.budget_ms:
+        print(f"FAIL: import time is {own_ms - args.budget_ms:.1f} ms over the budget.")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
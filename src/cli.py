@@ -1,30 +1,64 @@
+import sys
 import click
-from commands.add_expense import add_expense
-from commands.budget import set_budget, delete_budget, view_budget
-from commands.delete_expense import delete_expense
-from commands.export_expenses import export
-from commands.list_expenses import list_expenses
-from commands.summary_expenses import summary
-from commands.update_expense import update_expense
+from importlib import import_module
+from utils.daemon_client import SOCKET_PATH, run_in_daemon
+from utils.output import OUTPUT_FORMATS
 
 
-@click.group()
-@click.version_option(version="1.0.0", prog_name="Expense Tracker CLI")
-def cli():
-    pass
+# Commands and the module attribute that defines them, imported only when the command is used
+COMMANDS = {
+    "add": "commands.add_expense:add_expense",
+    "compact": "commands.maintenance:compact",
+    "daemon": "commands.daemon:daemon",
+    "set-budget": "commands.budget:set_budget",
+    "shell": "commands.shell:shell",
+    "delete-budget": "commands.budget:delete_budget",
+    "view-budget": "commands.budget:view_budget",
+    "delete": "commands.delete_expense:delete_expense",
+    "export": "commands.export_expenses:export",
+    "import": "commands.import_expenses:import_expenses",
+    "list": "commands.list_expenses:list_expenses",
+    "migrate": "commands.maintenance:migrate",
+    "rebuild-rollup": "commands.maintenance:rebuild_rollup",
+    "summary": "commands.summary_expenses:summary",
+    "update": "commands.update_expense:update_expense",
+}
+
+
+class LazyGroup(click.Group):
+    """
+    Click group that imports a command's module only when that command is invoked (or
+    when the full command list is needed, as in --help), so a call like 'add' doesn't
+    pay for the imports of 'export' or 'list'.
+    """
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = lazy_commands or {}
 
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
 
-# Registering commands
-cli.add_command(add_expense, name="add")
-cli.add_command(set_budget, name="set-budget")
-cli.add_command(delete_budget, name="delete-budget")
-cli.add_command(view_budget, name="view-budget")
-cli.add_command(delete_expense, name="delete")
-cli.add_command(export, name="export")
-cli.add_command(list_expenses, name="list")
-cli.add_command(summary, name="summary")
-cli.add_command(update_expense, name="update")
+    def get_command(self, ctx, cmd_name):
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            module_name, attribute = self.lazy_commands[cmd_name].split(":")
+            self.add_command(getattr(import_module(module_name), attribute), name=cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--format", "output_format", type=click.Choice(OUTPUT_FORMATS), default="table",
+    help="Output of list, summary and view-budget: styled tables (default), or plain tsv, json or ndjson records for scripts."
+)
+@click.version_option(version="1.0.0", prog_name="Expense Tracker CLI")
+def cli(output_format):
+    # With the plain formats, stdout only gets the records: messages and errors go to stderr
+    from styles.colors import console
+    console.stderr = output_format != "table"
 
 
 if __name__ == '__main__':
-    cli()
+    # While the daemon runs, the commands it answers are sent to it instead of loading the ledger here
+    if not (SOCKET_PATH.exists() and run_in_daemon(sys.argv[1:])):
+        cli()
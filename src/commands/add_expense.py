@@ -2,7 +2,8 @@ import click
 from datetime import datetime
 from styles.colors import console
 from utils.budget_helpers import check_budget_warning
-from utils.data_manager import initialize_csv, save_expense, get_next_expense_id
+from utils.data_manager import initialize_storage, save_expense, get_next_expense_id, ledger_lock
+from utils.records import Expense, parse_date
 from utils.validators import validate_parse_date, validate_amount, validate_category, validate_description
 
 
@@ -16,7 +17,7 @@ def add_expense(date, amount, category, description):
     Adds a new expense, including category, description, and amount.
     Validates inputs, saves the expense, and checks for budget warnings.
     """
-    initialize_csv()
+    initialize_storage()
 
     if date:
         year, month, day = validate_parse_date(date, force_full_date=True)
@@ -28,17 +29,13 @@ def add_expense(date, amount, category, description):
     category = validate_category(category)
     description = validate_description(description)
 
-    new_id = get_next_expense_id()
+    # Take the ID and save the expense with no other writer in between
+    with ledger_lock():
+        new_id = get_next_expense_id()
 
-    expense = {
-        "ID": str(new_id),
-        "Date": expense_date,
-        "Amount": f"{amount:.2f}",
-        "Category": category,
-        "Description": description,
-    }
+        expense = Expense(new_id, parse_date(expense_date), round(amount * 100), category, description)
 
-    save_expense(expense)
+        save_expense(expense)
 
     console.print(
     "\n[success]Expense added successfully:[/success]\n"
@@ -1,8 +1,9 @@
 import click
 from datetime import datetime
-from rich.table import Table
 from styles.colors import console
 from utils.budget_helpers import initialize_budget_file, read_budget, save_budget, update_budget, calculate_monthly_expenses
+from utils.data_manager import get_monthly_totals, ledger_lock
+from utils.output import get_output_format, write_records
 from utils.validators import validate_parse_date, validate_budget_amount
 
 
@@ -47,13 +48,16 @@ def delete_budget(date):
     if month is None:
         raise click.BadParameter("The date must include both year and month (e.g., '2025-01').", param_hint="'--date'")
 
-    budgets = read_budget()
-
     key = f"{year}-{month:02d}"
 
-    if key in budgets:
-        del budgets[key]
-        save_budget(budgets)
+    with ledger_lock():
+        budgets = read_budget()
+        deleted = key in budgets
+        if deleted:
+            del budgets[key]
+            save_budget(budgets)
+
+    if deleted:
         console.print(f"\n[success]Budget for [date]{year}-{month:02d}[/date] has been deleted.[/success]\n")
     else:
         console.print(f"\n[error]No budget found for [date]{year}-{month:02d}[/date].[/error]\n")
@@ -75,9 +79,10 @@ def view_budget(current, all, date):
     if not current and not all and not date:
         return console.print("\n[warning]Please specify an option:[/warning] [white][white_dim]--current[/white_dim], [white_dim]--all[/white_dim], or [white_dim]--date 'YYYY-MM'/'YYYY'[/white_dim].[/white]\n")
 
+    # Where nothing is found, the plain output formats still get an empty set of records
     if not budgets:
         console.print("\n[error]No budgets found.[/error]\n")
-        return
+        return _show_budgets([])
 
     # Validate and parse date
     if date:
@@ -85,64 +90,30 @@ def view_budget(current, all, date):
 
         if month is None:
             # Show budgets for the entire year
-            table = Table(title=f"\nBudgets for {year}", row_styles=["none", "dim"])
-            table.add_column("Date", justify="center", style="date", min_width=9)
-            table.add_column("Budget Total", justify="center", style="budget", min_width=15)
-            table.add_column("Current Expenses", justify="center", style="amount", min_width=15)
-            table.add_column("Difference", justify="center", min_width=15)
-
-            budgets_found = False
-
-            for key, budget_amount in budgets.items():
-                budget_year, budget_month = map(int, key.split("-"))
-
-                if budget_year == year:
-                    budgets_found = True
-                    current_expenses = calculate_monthly_expenses(budget_year, budget_month)
-                    difference = budget_amount - current_expenses
-                    difference_color = "budget2" if difference >= 0 else "amount2"
-
-                    table.add_row(
-                        key,
-                        f"${budget_amount:.2f}",
-                        f"${current_expenses:.2f}",
-                        f"[{difference_color}]${difference:.2f}[/{difference_color}]",
-                    )
-
-            if budgets_found:
-                console.print(table)
-            else:
+            monthly_totals = get_monthly_totals()
+            rows = [
+                (key, budget_amount, monthly_totals.get(key, 0.0))
+                for key, budget_amount in budgets.items()
+                if int(key.split("-")[0]) == year
+            ]
+            if not rows:
                 console.print(f"\n[warning]No budgets found for the year [date]{year}[/date].[/warning]\n")
-
+                return _show_budgets([])
+            _show_budgets([(f"\nBudgets for {year}", True, rows)])
             return
 
         # Show budget for a specific month
         key = f"{year}-{month:02d}"
         if key not in budgets:
             console.print(f"\n[warning]No budget found for [date]{key}[/date].[/warning]\n")
-            return
-
-        budget_amount = budgets[key]
-        current_expenses = calculate_monthly_expenses(year, month)
-        difference = budget_amount - current_expenses
-        difference_color = "budget2" if difference >= 0 else "amount2"
-
-        table = Table(title=f"\nBudget for {key}")
-        table.add_column("Date", justify="center", style="date", min_width=9)
-        table.add_column("Budget Total", justify="center", style="budget", min_width=15)
-        table.add_column("Current Expenses", justify="center", style="amount", min_width=15)
-        table.add_column("Difference", justify="center", min_width=15)
+            return _show_budgets([])
 
-        table.add_row(
-            key,
-            f"${budget_amount:.2f}",
-            f"${current_expenses:.2f}",
-            f"[{difference_color}]${difference:.2f}[/{difference_color}]",
-        )
-
-        console.print(table)
+        _show_budgets([(f"\nBudget for {key}", False, [(key, budgets[key], calculate_monthly_expenses(year, month))])])
         return
 
+    # Each section is a table: (title, striped rows, [(month key, budget, current expenses)])
+    sections = []
+
     # Show current budget
     if current:
         current_year = datetime.now().year
@@ -151,42 +122,46 @@ def view_budget(current, all, date):
 
         if key not in budgets:
             console.print(f"\n[warning]No budget found for [date]{current_year}-{current_month:02d}[/date].[/warning]\n")
-            return
+            return _show_budgets([])
 
-        budget_amount = budgets[key]
-        current_expenses = calculate_monthly_expenses(current_year, current_month)
-        difference = budget_amount - current_expenses
-        difference_color = "budget2" if difference >= 0 else "amount2"
+        sections.append((f"\nBudget for {key}", False, [(key, budgets[key], calculate_monthly_expenses(current_year, current_month))]))
 
-        table = Table(title=f"\nBudget for {current_year}-{current_month:02d}")
-        table.add_column("Date", justify="center", style="date", min_width=9)
-        table.add_column("Budget Total", justify="center", style="budget", min_width=15)
-        table.add_column("Current Expenses", justify="center", style="amount", min_width=15)
-        table.add_column("Difference", justify="center", min_width=15)
+    # Show all budgets
+    if all:
+        monthly_totals = get_monthly_totals()
+        rows = [(key, budget_amount, monthly_totals.get(key, 0.0)) for key, budget_amount in budgets.items()]
+        sections.append(("\nAll Budgets", True, rows))
+
+    _show_budgets(sections)
 
-        table.add_row(
-            f"{current_year}-{current_month:02d}",
-            f"${budget_amount:.2f}",
-            f"${current_expenses:.2f}",
-            f"[{difference_color}]${difference:.2f}[/{difference_color}]",
+
+def _show_budgets(sections):
+    """
+    Prints budget tables, or the rows of every table as plain records with the tsv, json and ndjson output
+    formats (an empty set of records when there are no sections).
+    """
+    output_format = get_output_format()
+    if output_format != "table":
+        rows = (
+            (key, budget_amount, current_expenses, round(budget_amount - current_expenses, 2))
+            for _, _, section_rows in sections
+            for key, budget_amount, current_expenses in section_rows
         )
+        write_records(["Date", "Budget", "Expenses", "Difference"], rows, output_format)
+        return
 
-        console.print(table)
+    from rich.table import Table
 
-    # Show all budgets
-    if all:
-        table = Table(title="\nAll Budgets", row_styles=["none", "dim"])
+    for title, striped, rows in sections:
+        table = Table(title=title, row_styles=["none", "dim"] if striped else None)
         table.add_column("Date", justify="center", style="date", min_width=9)
         table.add_column("Budget Total", justify="center", style="budget", min_width=15)
         table.add_column("Current Expenses", justify="center", style="amount", min_width=15)
         table.add_column("Difference", justify="center", min_width=15)
 
-        for key, budget_amount in budgets.items():
-            year, month = map(int, key.split("-"))
-            current_expenses = calculate_monthly_expenses(year, month)
+        for key, budget_amount, current_expenses in rows:
             difference = budget_amount - current_expenses
             difference_color = "budget2" if difference >= 0 else "amount2"
-
             table.add_row(
                 key,
                 f"${budget_amount:.2f}",
@@ -0,0 +1,44 @@
+import signal
+import sys
+import click
+from styles.colors import console
+from utils.daemon import LedgerDaemon
+from utils.daemon_client import send_request
+
+
+@click.command()
+@click.option("--stop", is_flag=True, help="Stop the daemon that is running.")
+@click.pass_context
+def daemon(ctx, stop):
+    """
+    Runs a local daemon that keeps the ledger and budgets in memory and answers the add, list,
+    summary and budget commands over a Unix socket (run/daemon.sock). While it runs, those
+    commands are sent to it; every other command, or any command when it isn't running,
+    works on the files directly. Stop it with Ctrl+C or with --stop.
+    """
+    root = ctx.find_root()
+    server = LedgerDaemon(root.command, root.info_name)
+
+    if stop:
+        if send_request({"stop": True}) is None:
+            console.print("\n[warning]The daemon isn't running.[/warning]\n")
+        else:
+            console.print("\n[success]Daemon stopped.[/success]\n")
+        return
+
+    if sys.platform == "win32":
+        console.print("\n[error]Error:[/error] [white]The daemon needs Unix domain sockets, which aren't available on this system.[/white]\n")
+        return
+
+    if server.is_running():
+        console.print(f"\n[warning]The daemon is already running on [white_dim]'{server.socket_path}'[/white_dim].[/warning]\n")
+        return
+
+    # Stop cleanly (removing the socket) when terminated
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    console.print(f"\n[success]Daemon listening on[/success] [white_dim]'{server.socket_path}'[/white_dim][white]. Press Ctrl+C to stop it.[/white]\n")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        pass
+    console.print("\n[success]Daemon stopped.[/success]\n")
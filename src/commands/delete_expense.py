@@ -1,7 +1,6 @@
 import click
-import csv
 from styles.colors import console
-from utils.data_manager import CSV_FILE_PATH, FIELD_NAMES, read_expenses
+from utils.data_manager import has_expenses, find_record, delete_expense_record, delete_all_expenses
 
 
 @click.command()
@@ -12,8 +11,7 @@ def delete_expense(id, all):
     Delete a specific expense by ID or clear all expenses after user confirmation.
     """
     try:
-        expenses = read_expenses()
-        if not expenses:
+        if not has_expenses():
             console.print("\n[warning]No expenses found. Nothing to delete.[/warning]\n")
             return
 
@@ -27,9 +25,7 @@ def delete_expense(id, all):
 
                 if confirmation in ["y", "yes"]:
                     try:
-                        with open(CSV_FILE_PATH, "w", newline="", encoding="utf-8") as file:
-                            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
-                            writer.writeheader()
+                        delete_all_expenses()
                         console.print("\n[success]All expenses have been deleted successfully.[/success]\n")
                     except Exception as e:
                         console.print(f"\n[error]Error when deleting all expenses:[/error] [white]{e}[/white]\n")
@@ -47,16 +43,14 @@ def delete_expense(id, all):
             console.print("\n[error]You must provide a valid positive ID.[/error]\n")
             return
 
-        updated_expenses = [expense for expense in expenses if int(expense["ID"]) != id]
+        expense = find_record(id)
 
-        if len(updated_expenses) == len(expenses):
+        if expense is None:
             console.print(f"\n[error]No expense found with ID [id]{id}[/id].[/error]\n")
             return
 
-        with open(CSV_FILE_PATH, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
-            writer.writeheader()
-            writer.writerows(updated_expenses)
+        # Record a tombstone in the journal
+        delete_expense_record(expense)
 
         console.print(f"\n[success]Expense with ID [id]{id}[/id] has been deleted successfully.[/success]\n")
 
@@ -1,40 +1,59 @@
 import click
+from itertools import chain
 from pathlib import Path
 from styles.colors import console
-from utils.budget_helpers import get_budget_summary
-from utils.data_manager import read_expenses
-from utils.export_helpers import write_csv, write_json, write_excel, generate_unique_filename, filter_expenses
+from utils.budget_helpers import get_budget_summary, read_budget
+from utils.data_manager import query_expenses, change_log_position, read_changes, ledger_lock
+from utils.export_helpers import write_exports, generate_unique_filename, get_output_format, read_watermark, save_watermark, changed_expenses
+from utils.query_engine import ExpenseQuery
 from utils.validators import validate_parse_date, validate_category
 
 
 @click.command()
-@click.option("--output", type=str, prompt="Name file", required=True, help="Name of the exported file (e.g., expenses.csv, expenses.json).")
+@click.option("--output", type=str, multiple=True, help="Name of the exported file (e.g., expenses.csv, expenses.json, expenses.ndjson.gz). Repeat it to export to several files at once.")
 @click.option("--date", type=str, help="Filter expenses by year (e.g., 2025) or year and month (e.g., 2025-01).")
 @click.option("--category", type=str, help="Filter expenses by category.")
 @click.option("--include-budget", is_flag=True, help="Include budget information in the export. Requires --date with year and month.")
-def export(output, date, category, include_budget):
+@click.option("--sheet-by", type=click.Choice(["month", "category"]), help="Excel only: put each month or category in its own sheet.")
+@click.option("--split-by", type=click.Choice(["year", "month", "category"]), help="Write one file per year, month or category (CSV, JSON and NDJSON only).")
+@click.option("--since-last", type=str, help="Name of an incremental export: only write the changes since its previous run (JSON and NDJSON only).")
+def export(output, date, category, include_budget, sheet_by, split_by, since_last):
     """
-    Export expenses to a file (CSV, JSON, or Excel) in the 'exports' directory, with optional filters by date or category.
-    Supports including budget information for the selected date.
+    Export expenses to a file (CSV, JSON, NDJSON or Excel) in the 'exports' directory, with optional filters by date or category.
+    Supports including budget information for the selected date. CSV, JSON and NDJSON files are written
+    as the expenses are read, and compressed with gzip if the name ends with '.gz'.
+    With several --output files, the ledger is read once and all the files are written at the same time.
+    With --split-by, each file is split into one file per group, also in a single read of the ledger.
+    With --since-last, only the expenses added, updated or deleted since the previous export with
+    that name are written, with deletions as tombstones. With filters, expenses that were changed so
+    they no longer match are also written as tombstones. The first run exports every expense.
     """
+    output_path = None
     try:
+        # click can't prompt for an option that can be repeated, so ask for a single file here
+        if not output:
+            output = (click.prompt("Name file"),)
+
         # Ensure the exports directory exists
         exports_dir = Path("exports")
         exports_dir.mkdir(parents=True, exist_ok=True)
 
-        # Create full output path in the exports directory
-        output_path = exports_dir / output
-        output_format = output_path.suffix.lower()
+        targets = []
+        for name in output:
+            # Create full output path in the exports directory
+            output_path = exports_dir / name
+            output_format = get_output_format(output_path)
 
-        # Validate output format
-        while output_format not in [".csv", ".json", ".xlsx"]:
-            console.print("\n[error]Invalid output format:[/error] [warning]Supported formats are '.csv', '.json' and '.xlsx' (Excel).[/warning]")
-            output = console.input("[white]Enter the name of the exported file [white_dim](e.g. 'expenses.json')[/white_dim]:[/white]")
-            output_path = exports_dir / output
-            output_format = output_path.suffix.lower()
+            # Validate output format
+            while output_format is None:
+                console.print(f"\n[error]Invalid output format for '{name}':[/error] [warning]Supported formats are '.csv', '.json', '.ndjson' (optionally ending in '.gz') and '.xlsx' (Excel).[/warning]")
+                name = console.input("[white]Enter the name of the exported file [white_dim](e.g. 'expenses.json')[/white_dim]:[/white]")
+                output_path = exports_dir / name
+                output_format = get_output_format(output_path)
 
-        # Handle duplicate file names by appending a unique suffix
-        output_path = generate_unique_filename(output_path)
+            # Handle duplicate file names by appending a unique suffix, also among the new files
+            output_path = generate_unique_filename(output_path, taken={path for path, _ in targets})
+            targets.append((output_path, output_format))
 
         # Validate inputs
         year = None
@@ -46,46 +65,93 @@ def export(output, date, category, include_budget):
         if category:
             category = validate_category(category)
 
-        # Ensure --date includes both year and month if --include-budget is used
-        if include_budget and (not year or not month):
-            raise click.UsageError("--include-budget requires --date with both year and month specified.")
-
-        # Read the source CSV file
-        expenses = read_expenses()
-
-        # Filter expenses
-        filtered_expenses = filter_expenses(
-            expenses=expenses,
-            year=year,
-            month=month,
-            category=category
-        )
-
-        if not filtered_expenses:
-            console.print("\n[warning]No expenses match the specified filters.[/warning]\n")
+        if sheet_by and not any(output_format == ".xlsx" for _, output_format in targets):
+            raise click.UsageError("--sheet-by can only be used with Excel (.xlsx) exports.")
+
+        if split_by and any(output_format == ".xlsx" for _, output_format in targets):
+            raise click.UsageError("--split-by can't be used with Excel (.xlsx) exports. Use --sheet-by to split them into sheets.")
+
+        if since_last and not all(output_format in [".json", ".ndjson"] for _, output_format in targets):
+            raise click.UsageError("--since-last can only be used with JSON and NDJSON exports, which can hold deletions.")
+        if since_last and split_by:
+            raise click.UsageError("--since-last can't be used with --split-by.")
+
+        # Ensure --date includes both year and month if --include-budget is used (split exports by month get the budget of each month)
+        if include_budget and (not year or not month) and split_by != "month":
+            raise click.UsageError("--include-budget requires --date with both year and month specified, or --split-by month.")
+
+        # Incremental exports read the change log from where their previous run stopped
+        watermark = read_watermark(since_last) if since_last else None
+        log_end = None
+        if since_last:
+            # Writers append to the change log under the lock, so its end is always after a whole entry
+            with ledger_lock():
+                log_end = change_log_position()
+        if watermark is not None and watermark > log_end:
+            console.print(f"\n[warning]The change log was reset since the last '{since_last}' export.[/warning] [white]Exporting every expense.[/white]")
+            watermark = None
+
+        if watermark is not None:
+            changes, added = read_changes(watermark, log_end)
+            filtered_expenses = changed_expenses(changes, added, ExpenseQuery(year=year, month=month, category=category))
+        else:
+            # Filter expenses in the storage backend, streaming them to the writers
+            filtered_expenses = query_expenses(
+                year=year,
+                month=month,
+                category=category
+            )
+
+        # Peek at the first match so no file is created when nothing matches
+        first_expense = next(filtered_expenses, None)
+        if first_expense is None:
+            if since_last:
+                save_watermark(since_last, log_end)
+                console.print(f"\n[warning]No changes to export since the last '{since_last}' export.[/warning]\n")
+            else:
+                console.print("\n[warning]No expenses match the specified filters.[/warning]\n")
             return
+        filtered_expenses = chain([first_expense], filtered_expenses)
 
-        # Budget information
+        # Budget information, computed once for every file (or once per month for split exports)
         budget_info = None
-        if include_budget:
-            budget_info = get_budget_summary(year=year, month=month)
-            if not budget_info["budget_set"]:
-                console.print(f"\n[warning]No budget found for {year}-{month:02d}.[/warning] [white]Exporting expenses without budget information.[/white]")
-                budget_info = None
-
-        # Write the filtered expenses to the output file
-        if output_format == ".csv":
-            write_csv(output_path, filtered_expenses, budget_info=budget_info)
-        elif output_format == ".json":
-            write_json(output_path, filtered_expenses, budget_info=budget_info)
-        elif output_format == ".xlsx":
-            write_excel(output_path, filtered_expenses, budget_info=budget_info)
-
-        console.print(f"\n[success]Expenses successfully exported to [white_dim]'{output_path}'[/white_dim].[/success]\n")
-
+        if include_budget and split_by == "month":
+            budgets = read_budget()
+
+            def budget_for(month_key):
+                if month_key not in budgets:
+                    return None
+                budget_year, budget_month = map(int, month_key.split("-"))
+                return get_budget_summary(year=budget_year, month=budget_month)
+        else:
+            budget_for = None
+            if include_budget:
+                budget_info = get_budget_summary(year=year, month=month)
+                if not budget_info["budget_set"]:
+                    console.print(f"\n[warning]No budget found for {year}-{month:02d}.[/warning] [white]Exporting expenses without budget information.[/white]")
+                    budget_info = None
+
+        # Write the filtered expenses to the output files
+        counts = write_exports(
+            targets, filtered_expenses, budget_info=budget_info, sheet_by=sheet_by, split_by=split_by, budget_for=budget_for
+        )
+        if since_last:
+            save_watermark(since_last, log_end)
+
+        if split_by:
+            files = "\n".join(f"[white]- [white_dim]'{output_path}'[/white_dim]: {count} expenses[/white]" for output_path, count in counts.items())
+            console.print(f"\n[success]Expenses successfully exported to {len(counts)} files:[/success]\n{files}\n")
+        else:
+            exported = "\n".join(
+                f"[success]Expenses successfully exported to [white_dim]'{output_path}'[/white_dim].[/success]" for output_path in counts
+            )
+            console.print(f"\n{exported}\n")
+
+    except click.UsageError as e:
+        console.print(f"\n[error]Usage error:[/error] [white]{e}[/white]\n")
     except FileNotFoundError:
         console.print("\n[error]Error:[/error] [white]No expenses file was found.[/white]\n")
-    except PermissionError:
-        console.print(f"\n[error]Error:[/error] [white]Permission denied to write to [white_dim]'{output_path}'[/white_dim].[/white]\n")
+    except PermissionError as e:
+        console.print(f"\n[error]Error:[/error] [white]Permission denied to write to [white_dim]'{e.filename or output_path}'[/white_dim].[/white]\n")
     except Exception as e:
         console.print(f"\n[error]Unexpected error:[/error] [white]{e}[/white]\n")
@@ -0,0 +1,72 @@
+import sys
+import click
+from contextlib import nullcontext
+from pathlib import Path
+from styles.colors import console
+from utils.data_manager import initialize_storage, save_expenses, get_next_expense_id, ledger_lock
+from utils.export_helpers import generate_unique_filename
+from utils.import_helpers import IMPORT_FORMATS, IMPORT_READERS, RejectWriter, validate_rows, build_expense_rows
+
+
+# Formats guessed from the input file extension
+IMPORT_EXTENSIONS = {".csv": "csv", ".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+@click.command()
+@click.option("--input", "input_file", type=str, required=True, help="File to import, or '-' to read from the standard input.")
+@click.option("--format", "input_format", type=click.Choice(IMPORT_FORMATS), help="Format of the input. Defaults to the file extension.")
+@click.option("--rejects", type=str, default="import_rejects.csv", help="Name of the file, in the 'exports' directory, for the rejected rows.")
+def import_expenses(input_file, input_format, rejects):
+    """
+    Imports expenses in bulk from a CSV, JSON or NDJSON file, or from the standard input.
+    Rows need a date, an amount and a category (and optionally a description), and are validated
+    with the same rules as the add command. Valid rows get a contiguous block of new IDs and are
+    saved in a single append. Rejected rows are written to a reject file with the reason.
+    """
+    reject = None
+    try:
+        if input_format is None:
+            if input_file == "-":
+                raise click.UsageError("--format is required when reading from the standard input.")
+            input_format = IMPORT_EXTENSIONS.get(Path(input_file).suffix.lower())
+            if input_format is None:
+                raise click.UsageError("Unknown file extension. Use --format to choose between csv, json and ndjson.")
+
+        initialize_storage()
+
+        # Rejected rows go to a reject file, created only if a row is rejected
+        reject = RejectWriter(generate_unique_filename(Path("exports") / rejects))
+
+        source = nullcontext(sys.stdin) if input_file == "-" else open(input_file, "r", newline="", encoding="utf-8")
+        expenses = []
+        with source as file:
+            for batch in validate_rows(IMPORT_READERS[input_format](file), on_reject=reject):
+                expenses.extend(batch)
+
+        if expenses:
+            with ledger_lock():
+                first_id = get_next_expense_id()
+                save_expenses(build_expense_rows(expenses, first_id))
+            console.print(
+                f"\n[success]Imported {len(expenses)} expenses[/success] "
+                f"[white](IDs [id]{first_id}[/id] to [id]{first_id + len(expenses) - 1}[/id]).[/white]"
+            )
+        else:
+            console.print("\n[warning]No valid expenses to import.[/warning]")
+
+        if reject.count:
+            console.print(f"[warning]{reject.count} rows were rejected.[/warning] [white]See [white_dim]'{reject.path}'[/white_dim] for the reasons.[/white]\n")
+        else:
+            console.print()
+
+    except click.UsageError as e:
+        console.print(f"\n[error]Usage error:[/error] [white]{e}[/white]\n")
+    except FileNotFoundError:
+        console.print(f"\n[error]Error:[/error] [white]The file [white_dim]'{input_file}'[/white_dim] was not found.[/white]\n")
+    except ValueError as e:
+        console.print(f"\n[error]Invalid input file:[/error] [white]{e}[/white] [white]Nothing was imported.[/white]\n")
+    except Exception as e:
+        console.print(f"\n[error]Unexpected error:[/error] [white]{e}[/white]\n")
+    finally:
+        if reject is not None:
+            reject.close()
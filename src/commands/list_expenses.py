@@ -1,17 +1,31 @@
 import click
-from rich.table import Table
+from itertools import islice
 from styles.colors import console
-from utils.data_manager import read_expenses
+from utils.data_manager import FIELD_NAMES, query_records, has_expenses
+from utils.output import get_output_format, write_records
+from utils.sorting import SORT_KEYS, sort_records
 from utils.validators import validate_parse_date, validate_amount, validate_category
 
 
+# Expenses per page with --page when --limit isn't given
+DEFAULT_PAGE_SIZE = 20
+
+# Long lists are printed as they are read, this many rows at a time
+STREAM_CHUNK_ROWS = 1000
+
+
 @click.command()
 @click.option("--category", type=str, help="Filter by expense category")
 @click.option("--from", "start_date", help="Filter expenses from this date onwards (YYYY-MM-DD). Combine with --to for a date range.")
 @click.option("--to", "end_date", help="Filter expenses up to this date (YYYY-MM-DD). Combine with --from for a date range.")
 @click.option("--min", "min_amount", type=float, help="Show expenses above or equal to this amount")
 @click.option("--max", "max_amount", type=float, help="Show expenses below or equal to this amount")
-def list_expenses(category, start_date, end_date, min_amount, max_amount):
+@click.option("--sort", "sort_by", type=click.Choice(list(SORT_KEYS)), help="Sort by date, amount, category or id (default: the order they were added).")
+@click.option("--desc", is_flag=True, help="Sort in descending order. Without --sort, shows the newest expenses first.")
+@click.option("--limit", type=click.IntRange(min=1), help="Show at most this many expenses.")
+@click.option("--offset", type=click.IntRange(min=0), help="Skip this many expenses before the first one shown.")
+@click.option("--page", type=click.IntRange(min=1), help=f"Show this page of --limit expenses ({DEFAULT_PAGE_SIZE} by default).")
+def list_expenses(category, start_date, end_date, min_amount, max_amount, sort_by, desc, limit, offset, page):
     """
     List and filter expenses.
 
@@ -21,71 +35,116 @@ def list_expenses(category, start_date, end_date, min_amount, max_amount):
     - Amount filters show expenses within the specified range
 
     All filters can be combined. When no filters are applied, shows all expenses.
+    Results can be sorted (--sort, --desc) and paged (--limit with --offset or --page).
     """
-    try:
-        expenses = read_expenses()
-    except FileNotFoundError:
-        console.print("\n[error]Error:[/error] [white]No expenses file was found.[/white]\n")
-        return
-
-    if not expenses:
-        console.print("\n[warning]No expenses recorded.[/warning]\n")
-        return
-
-    # Filters
+    # Validate filters
     if category:
         category = validate_category(category)
-        expenses = [expense for expense in expenses if expense["Category"] == category]
-
-    if start_date and end_date:
-        validate_parse_date(start_date, force_full_date=True)
-        validate_parse_date(end_date, force_full_date=True)
 
-        if start_date > end_date:
-            start_date, end_date = end_date, start_date
-
-        expenses = [expense for expense in expenses if start_date <= expense["Date"] <= end_date]
-
-    if start_date and not end_date:
+    if start_date:
         validate_parse_date(start_date, force_full_date=True)
-        expenses = [expense for expense in expenses if expense["Date"] >= start_date]
 
-    if end_date and not start_date:
+    if end_date:
         validate_parse_date(end_date, force_full_date=True)
-        expenses = [expense for expense in expenses if expense["Date"] <= end_date]
+
+    if start_date and end_date and start_date > end_date:
+        start_date, end_date = end_date, start_date
 
     if min_amount is not None:
         min_amount = validate_amount(min_amount)
-        expenses = [expense for expense in expenses if float(expense["Amount"]) >= min_amount]
 
     if max_amount is not None:
         max_amount = validate_amount(max_amount)
-        expenses = [expense for expense in expenses if float(expense["Amount"]) <= max_amount]
 
-    if not expenses:
-        console.print("\n[warning]No expenses matched the given filters.[/warning]\n")
+    if offset is not None and page is not None:
+        console.print("\n[error]Usage error:[/error] [white]--offset and --page can't be used together.[/white]\n")
         return
+    if page is not None:
+        limit = limit or DEFAULT_PAGE_SIZE
+        offset = (page - 1) * limit
+
+    # Filtering is pushed down to the storage backend; sorting keeps only the requested page
+    try:
+        expenses = sort_records(
+            query_records(
+                category=category,
+                start_date=start_date,
+                end_date=end_date,
+                min_amount=min_amount,
+                max_amount=max_amount,
+            ),
+            sort_by=sort_by,
+            descending=desc,
+            limit=limit,
+            offset=offset or 0,
+        )
+        output_format = get_output_format()
+        if output_format != "table":
+            # Plain records straight to stdout, without building any table
+            rows = ((expense.id, expense.date.isoformat(), expense.cents / 100, expense.category, expense.description) for expense in expenses)
+            write_records(FIELD_NAMES, rows, output_format)
+            return
+        first_rows = list(islice(expenses, STREAM_CHUNK_ROWS))
+    except FileNotFoundError:
+        console.print("\n[error]Error:[/error] [white]No expenses file was found.[/white]\n")
+        return
+
+    if not first_rows:
+        if offset:
+            console.print("\n[warning]No expenses on this page.[/warning]\n")
+        elif has_expenses():
+            console.print("\n[warning]No expenses matched the given filters.[/warning]\n")
+        else:
+            console.print("\n[warning]No expenses recorded.[/warning]\n")
+        return
+
+    title = "\nFiltered Expenses" if any([category, start_date, end_date, min_amount, max_amount]) else "\nExpenses"
+    next_rows = list(islice(expenses, STREAM_CHUNK_ROWS))
+    if not next_rows:
+        console.print(_build_table(first_rows, title))
+        return
+
+    # Long lists are printed in chunks as they are read, with the column widths of the first chunk
+    widths = _column_widths(first_rows)
+    console.print(_build_table(first_rows, title, widths))
+    while next_rows:
+        console.print(_build_table(next_rows, None, widths))
+        next_rows = list(islice(expenses, STREAM_CHUNK_ROWS))
+
+
+def _column_widths(expenses):
+    return {
+        "ID": max(6, *(len(str(expense.id)) for expense in expenses)),
+        "Date": 12,
+        "Amount": max(10, *(len(f"$ {expense.amount:.2f}") for expense in expenses)),
+        "Category": max(15, *(len(expense.category) for expense in expenses)),
+        "Description": min(70, max(15, *(len(expense.description) for expense in expenses))),
+    }
+
+
+def _build_table(expenses, title, widths=None):
+    """
+    Builds the table of a list of expenses. With fixed column widths (used when a long list is
+    printed in chunks), only the table with a title shows the header.
+    """
+    from rich.table import Table
 
-    # Create table
-    table = Table(
-        title="\nFiltered Expenses" if any([category, start_date, end_date, min_amount, max_amount]) 
-        else "\nExpenses",
-        row_styles=["none", "dim"],
-    )
+    table = Table(title=title, row_styles=["none", "dim"], show_header=widths is None or title is not None)
 
-    table.add_column("ID", style="id", min_width=6)
-    table.add_column("Date", justify="center", style="date", min_width=12)
-    table.add_column("Amount", justify="right", style="amount", min_width=10)
-    table.add_column("Category", justify="left", style="category", min_width=15)
-    table.add_column("Description", justify="left", style="white", min_width=15, max_width=70)
+    fixed = widths or {}
+    table.add_column("ID", style="id", min_width=6, width=fixed.get("ID"))
+    table.add_column("Date", justify="center", style="date", min_width=12, width=fixed.get("Date"))
+    table.add_column("Amount", justify="right", style="amount", min_width=10, width=fixed.get("Amount"))
+    table.add_column("Category", justify="left", style="category", min_width=15, width=fixed.get("Category"))
+    table.add_column("Description", justify="left", style="white", min_width=15, max_width=70, width=fixed.get("Description"))
 
     for expense in expenses:
         table.add_row(
-            f"{expense['ID']}",
-            f"{expense['Date']}",
-            f"$ {float(expense['Amount']):.2f}",
-            f"{expense['Category']}",
-            f"{expense['Description']}",
+            f"{expense.id}",
+            f"{expense.date.isoformat()}",
+            f"$ {expense.amount:.2f}",
+            f"{expense.category}",
+            f"{expense.description}",
         )
 
-    console.print(table)
+    return table
@@ -0,0 +1,53 @@
+import click
+from styles.colors import console
+from utils.data_manager import STORAGE_FORMATS, PARTITION_SCHEMES, rebuild_ledger_meta, compact_expenses, is_storage_format, migrate_storage
+
+
+# Rebuild rollup
+@click.command()
+def rebuild_rollup():
+    """
+    Rebuilds the per-month and per-category totals from the expenses file.
+    Use it to recover if the rollup file was lost or edited by hand.
+    """
+    meta = rebuild_ledger_meta()
+    months = len(meta["rollup"])
+    expenses = sum(count for categories in meta["rollup"].values() for _, count in categories.values())
+    console.print(f"\n[success]Rollup rebuilt:[/success] [white]{expenses} expenses in {months} months.[/white]\n")
+
+
+# Compact
+@click.command()
+def compact():
+    """
+    Folds the pending updates and deletions from the journal into the expenses file.
+    With the columnar format, deleted rows and stale descriptions are dropped instead.
+    """
+    folded = compact_expenses()
+    if folded == 0:
+        console.print("\n[warning]Nothing to compact. The journal is empty.[/warning]\n")
+        return
+    console.print(f"\n[success]Ledger compacted:[/success] [white]{folded} changes folded into the expenses file.[/white]\n")
+
+
+# Migrate
+@click.command()
+@click.option("--to", "target_format", type=click.Choice(STORAGE_FORMATS), required=True, help="Storage format to move the ledger to.")
+@click.option("--partition-by", type=click.Choice(PARTITION_SCHEMES), help="How the partitioned format splits the ledger (default: year).")
+def migrate(target_format, partition_by):
+    """
+    Moves the ledger to another storage format: 'csv' (data/expenses.csv), 'columnar'
+    (memory-mapped binary columns in data/columnar), 'sqlite' (indexed database in data/expenses.db)
+    or 'partitioned' (one CSV file per year or month in data/partitions).
+    """
+    if partition_by and target_format != "partitioned":
+        console.print("\n[error]Usage error:[/error] [white]--partition-by can only be used with '--to partitioned'.[/white]\n")
+        return
+
+    if is_storage_format(target_format, partition_by):
+        scheme = f" by {partition_by}" if partition_by else ""
+        console.print(f"\n[warning]The ledger is already stored as '{target_format}'{scheme}.[/warning]\n")
+        return
+
+    moved = migrate_storage(target_format, partition_by)
+    console.print(f"\n[success]Ledger migrated to '{target_format}':[/success] [white]{moved} expenses moved.[/white]\n")
@@ -0,0 +1,82 @@
+import shlex
+import click
+from styles.colors import console
+from utils.daemon_client import command_name
+from utils.data_manager import create_storage, get_storage_format, use_storage
+from utils.memory_store import MemoryStorage
+
+
+# Commands that replace the storage files: they run against the files, and the ledger is loaded again afterwards
+DIRECT_COMMANDS = {"migrate"}
+EXIT_COMMANDS = {"exit", "quit"}
+
+
+@click.command()
+@click.pass_context
+def shell(ctx):
+    """
+    Starts an interactive shell that loads the ledger and the budgets once and runs the other
+    commands against them in memory (e.g., 'add --amount 12.5 --category Groceries').
+    Changes are saved to the files as they are made. Type 'help' to list the commands and 'exit' to quit.
+    """
+    try:
+        # Line editing and history, where available
+        import readline  # noqa: F401
+    except ImportError:
+        pass
+
+    root = ctx.find_root()
+    memory = MemoryStorage(create_storage(get_storage_format()))
+    memory.initialize()
+    memory.load()
+    console.print(
+        f"\n[success]Expense Tracker shell.[/success] [white]{len(memory)} expenses loaded. "
+        f"Type [white_dim]help[/white_dim] for the commands and [white_dim]exit[/white_dim] to quit.[/white]\n"
+    )
+
+    try:
+        while True:
+            try:
+                line = console.input("[info]expenses>[/info] ")
+            except EOFError:
+                console.print()
+                break
+            except KeyboardInterrupt:
+                console.print()
+                continue
+
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                console.print(f"\n[error]Usage error:[/error] [white]{e}[/white]\n")
+                continue
+
+            if not args:
+                continue
+            if args[0] in EXIT_COMMANDS:
+                break
+            if args[0] == "help":
+                args = ["--help"]
+            elif args[0] == "shell":
+                console.print("\n[warning]Already in the shell.[/warning]\n")
+                continue
+
+            # Follow a migration, and pick up changes made by other processes
+            if memory.backend.name != get_storage_format():
+                memory = MemoryStorage(create_storage(get_storage_format()))
+            memory.refresh()
+
+            use_storage(None if command_name(args) in DIRECT_COMMANDS else memory)
+            try:
+                root.command.main(args, prog_name=root.info_name, standalone_mode=False)
+            except click.ClickException as e:
+                e.show()
+            except click.Abort:
+                console.print("\n[warning]Aborted.[/warning]\n")
+            except Exception as e:
+                console.print(f"\n[error]Unexpected error:[/error] [white]{e}[/white]\n")
+            finally:
+                use_storage(None)
+                console.stderr = False
+    finally:
+        use_storage(None)
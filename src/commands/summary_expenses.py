@@ -2,7 +2,8 @@ import click
 from datetime import datetime
 from styles.colors import console
 from utils.budget_helpers import read_budget, calculate_monthly_expenses
-from utils.data_manager import read_expenses, filter_expenses
+from utils.data_manager import summarize_expenses
+from utils.output import get_output_format, write_records
 from utils.validators import validate_parse_date, validate_category
 
 
@@ -13,6 +14,7 @@ def summary(date, category):
     """
     Displays a summary of expenses, optionally filtered by date or category.
     It also includes budget information, if applicable, and provides a breakdown of expenses by category.
+    With the tsv, json and ndjson output formats, only the breakdown is written, one record per category.
     """
     try:
         # Parse and validate the date
@@ -23,12 +25,17 @@ def summary(date, category):
         if target_category:
             validate_category(target_category)
 
-        # Read and process CSV file
-        expenses = read_expenses()
-        total_expense, filtered_expense, category_summary = filter_expenses(
-            expenses, year, month, target_category
+        # Read the totals from the rollup
+        total_expense, filtered_expense, category_summary = summarize_expenses(
+            year, month, target_category
         )
 
+        output_format = get_output_format()
+        if output_format != "table":
+            # One plain record per category, totalled over the filtered expenses
+            write_records(["Category", "Amount"], list(category_summary.items()), output_format)
+            return
+
         # Read the budget for the target month and year
         budgets = read_budget()
         budget_key = f"{year}-{month:02d}" if year and month else None
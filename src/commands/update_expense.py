@@ -1,8 +1,8 @@
 import click
-import csv
 from styles.colors import console
 from utils.budget_helpers import check_budget_warning
-from utils.data_manager import CSV_FILE_PATH, FIELD_NAMES, initialize_csv, read_expenses
+from utils.data_manager import initialize_storage, find_record, update_expense_record, to_cents
+from utils.records import parse_date
 from utils.validators import validate_parse_date, validate_amount, validate_category, validate_description
 
 
@@ -24,82 +24,66 @@ def update_expense(id, date, amount, category, description):
         if not (date or category or description or amount):
             raise click.UsageError("You must provide at least one field to update (e.g., --date).")
 
-        initialize_csv()
-
-        # Validate that the file exists
-        expenses = read_expenses()
-        if not expenses:
-            console.print("\n[error]Error:[/error] No expenses found. The file is empty.\n")
-            return
+        initialize_storage()
 
         # Find the ID and update if it exists
-        expense_found = False
-        updated_date = None
-        update_summary = []
-        for expense in expenses:
-            if expense["ID"] == str(id):
-                expense_found = True
-
-                # Track and compare changes
-                original_date = expense["Date"]
-                original_category = expense["Category"]
-                original_description = expense["Description"]
-                original_amount = expense["Amount"]
-
-                if date:
-                    year, month, day = validate_parse_date(date, force_full_date=True)
-                    validated_date = f"{year:04d}-{month:02d}-{day:02d}"
-                    if original_date != validated_date:
-                        update_summary.append(f"[white]- New Date: [white_dim]{original_date}[/white_dim] ---> [date]{validated_date}[/date][/white]")
-                    else:
-                        update_summary.append(f"[white]- Date: [date]{original_date}[/date][/white]")
-                    expense["Date"] = validated_date
-                    updated_date = validated_date
-                else:
-                    update_summary.append(f"[white]- Date: [date]{original_date}[/date][/white]")
-                    updated_date = original_date
-
-                if amount is not None:
-                    validated_amount = f"{validate_amount(amount):.2f}"
-                    if original_amount != validated_amount:
-                        update_summary.append(f"[white]- New Amount: [white_dim]${original_amount}[/white_dim] ---> [amount]${validated_amount}[/amount][white]")
-                    else:
-                        update_summary.append(f"[white]- Amount: [amount]${original_amount}[/amount][white]")
-                    expense["Amount"] = validated_amount
-                else:
-                    update_summary.append(f"[white]- Amount: [amount]${original_amount}[/amount][white]")
-
-                if category:
-                    validated_category = validate_category(category)
-                    if original_category != validated_category:
-                        update_summary.append(f"[white]- New Category: [white_dim]'{original_category}'[/white_dim] ---> [category]'{validated_category}'[/category][/white]")
-                    else:
-                        update_summary.append(f"[white]- Category: [category]'{original_category}'[/category][/white]")
-                    expense["Category"] = validated_category
-                else:
-                    update_summary.append(f"[white]- Category: [category]'{original_category}'[category][/white]")
-
-                if description:
-                    validated_description = validate_description(description)
-                    if original_description != validated_description:
-                        update_summary.append(f"[white]- New Description: [white_dim]'{original_description}'[/white_dim] ---> [description]'{validated_description}'[/description][white]")
-                    else:
-                        update_summary.append(f"[white]- Description: [description]'{original_description}'[/description][white]")
-                    expense["Description"] = validated_description
-                else:
-                    update_summary.append(f"[white]- Description: [description]'{original_description}'[/description][white]")
-
-                break
-
-        if not expense_found:
+        expense = find_record(id)
+        if expense is None:
             console.print(f"\n[error]Error:[/error] No expense found with ID [id]{id}[/id].\n")
             return
 
-        # Overwrite file with updated data
-        with open(CSV_FILE_PATH, "w", newline="", encoding="utf-8") as file:
-            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
-            writer.writeheader()
-            writer.writerows(expenses)
+        original_expense = expense.copy()
+        update_summary = []
+
+        # Track and compare changes
+        original_date = expense.date.isoformat()
+        original_category = expense.category
+        original_description = expense.description
+        original_amount = f"{expense.amount:.2f}"
+
+        if date:
+            year, month, day = validate_parse_date(date, force_full_date=True)
+            validated_date = f"{year:04d}-{month:02d}-{day:02d}"
+            if original_date != validated_date:
+                update_summary.append(f"[white]- New Date: [white_dim]{original_date}[/white_dim] ---> [date]{validated_date}[/date][/white]")
+            else:
+                update_summary.append(f"[white]- Date: [date]{original_date}[/date][/white]")
+            expense.date = parse_date(validated_date)
+        else:
+            update_summary.append(f"[white]- Date: [date]{original_date}[/date][/white]")
+
+        if amount is not None:
+            validated_amount = f"{validate_amount(amount):.2f}"
+            if original_amount != validated_amount:
+                update_summary.append(f"[white]- New Amount: [white_dim]${original_amount}[/white_dim] ---> [amount]${validated_amount}[/amount][white]")
+            else:
+                update_summary.append(f"[white]- Amount: [amount]${original_amount}[/amount][white]")
+            expense.cents = to_cents(validated_amount)
+        else:
+            update_summary.append(f"[white]- Amount: [amount]${original_amount}[/amount][white]")
+
+        if category:
+            validated_category = validate_category(category)
+            if original_category != validated_category:
+                update_summary.append(f"[white]- New Category: [white_dim]'{original_category}'[/white_dim] ---> [category]'{validated_category}'[/category][/white]")
+            else:
+                update_summary.append(f"[white]- Category: [category]'{original_category}'[/category][/white]")
+            expense.category = validated_category
+        else:
+            update_summary.append(f"[white]- Category: [category]'{original_category}'[category][/white]")
+
+        if description:
+            validated_description = validate_description(description)
+            if original_description != validated_description:
+                update_summary.append(f"[white]- New Description: [white_dim]'{original_description}'[/white_dim] ---> [description]'{validated_description}'[/description][white]")
+            else:
+                update_summary.append(f"[white]- Description: [description]'{original_description}'[/description][white]")
+            expense.description = validated_description
+        else:
+            update_summary.append(f"[white]- Description: [description]'{original_description}'[/description][white]")
+
+        # Save the change (a journal entry for the CSV storage)
+        update_expense_record(original_expense, expense)
 
         # Print the update summary
         console.print(f"\n[success]Expense with ID [id]{id}[/id] updated successfully:[/success]")
@@ -107,10 +91,7 @@ def update_expense(id, date, amount, category, description):
             console.print(change)
 
         # Check if the updated expense affects the monthly budget
-        expense_year, expense_month, _ = map(int, updated_date.split("-"))
-
-        # Budget message
-        budget_warning_message = check_budget_warning(expense_year, expense_month)
+        budget_warning_message = check_budget_warning(expense.date.year, expense.date.month)
         if budget_warning_message is not None:
             console.print(budget_warning_message)
 
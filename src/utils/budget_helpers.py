@@ -1,13 +1,17 @@
 import json
 import click
 from pathlib import Path
-from datetime import datetime
 from styles.colors import console
-from utils.data_manager import read_expenses
+from utils.data_manager import get_monthly_total, ledger_lock
+from utils.ledger_index import file_identity
+from utils.locking import atomic_write
 
 
 BUDGET_FILE_PATH = Path("data/budgets.json")
 
+# The budgets last read or saved by this process, with the stamp of the file they match
+_budget_cache = None
+
 
 def initialize_budget_file():
     """
@@ -16,21 +20,31 @@ def initialize_budget_file():
     The budget file is stored in JSON format.
     """
     BUDGET_FILE_PATH.parent.mkdir(exist_ok=True)
-    if not BUDGET_FILE_PATH.exists():
-        BUDGET_FILE_PATH.write_text("{}", encoding="utf-8")
+    try:
+        # Exclusive creation, so budgets just saved by another process are kept
+        with BUDGET_FILE_PATH.open("x", encoding="utf-8") as file:
+            file.write("{}")
+    except FileExistsError:
+        pass
 
 
 def read_budget():
     """
     Reads the budget data from the budget file.
+    The budgets are kept in memory, and the file is only parsed again after it changes.
 
     Returns:
         dict: A dictionary containing the budget data, where keys are "YYYY-MM" strings
               and values are the budget amounts for those months.
     """
-    if not BUDGET_FILE_PATH.exists():
+    global _budget_cache
+    stamp = file_identity(BUDGET_FILE_PATH)
+    if stamp is None:
         initialize_budget_file()
-    return json.loads(BUDGET_FILE_PATH.read_text(encoding="utf-8"))
+        stamp = file_identity(BUDGET_FILE_PATH)
+    if _budget_cache is None or _budget_cache[0] != stamp:
+        _budget_cache = (stamp, json.loads(BUDGET_FILE_PATH.read_text(encoding="utf-8")))
+    return dict(_budget_cache[1])
 
 
 def save_budget(budgets):
@@ -40,10 +54,22 @@ def save_budget(budgets):
     Args:
         budgets (dict): A dictionary containing budget data to save.
     """
+    global _budget_cache
     sorted_budgets = {k: budgets[k] for k in sorted(budgets.keys(), reverse=True)}
-    BUDGET_FILE_PATH.write_text(
-        json.dumps(sorted_budgets, indent=4, ensure_ascii=False), encoding="utf-8"
-    )
+    with atomic_write(BUDGET_FILE_PATH, encoding="utf-8") as file:
+        file.write(json.dumps(sorted_budgets, indent=4, ensure_ascii=False))
+    _budget_cache = (file_identity(BUDGET_FILE_PATH), sorted_budgets)
+
+
+def set_budget_amount(key: str, amount: float):
+    """
+    Sets the budget of a month ("YYYY-MM"), reading and saving the budgets under the ledger's
+    write lock so budgets saved by other processes in the meantime aren't lost.
+    """
+    with ledger_lock():
+        budgets = read_budget()
+        budgets[key] = amount
+        save_budget(budgets)
 
 
 def update_budget(month: int, year: int, amount: float):
@@ -65,8 +91,7 @@ def update_budget(month: int, year: int, amount: float):
             confirmation = click.prompt(f"Do you want to update the budget for {year}-{month:02d}? (y/n)", type=str).lower()
 
             if confirmation in ['y', 'yes']:
-                budgets[key] = amount
-                save_budget(budgets)
+                set_budget_amount(key, amount)
                 console.print(f"\nBudget for [date]{year}-{month:02d}[/date] updated to [budget]${amount:.2f}[/budget].\n")
                 return
             elif confirmation in ['n', 'no']:
@@ -75,14 +100,14 @@ def update_budget(month: int, year: int, amount: float):
             else:
                 console.print("\n[warning]Invalid input[/warning]. Please enter [success]'y/yes'[/success] or [error]'n/no'[/error].\n")
     else:
-        budgets[key] = amount
-        save_budget(budgets)
+        set_budget_amount(key, amount)
         console.print(f"\nBudget for [date]{year}-{month:02d}[/date] set at [budget]${amount:.2f}[/budget].\n")
 
 
 def calculate_monthly_expenses(year: int, month: int) -> float:
     """
-    Calculates the total expenses for a specific month and year from the expense data.
+    Calculates the total expenses for a specific month and year.
+    Uses the monthly totals maintained in the ledger metadata instead of scanning every expense.
 
     Args:
         year (int): The year of the expenses to calculate.
@@ -91,18 +116,7 @@ def calculate_monthly_expenses(year: int, month: int) -> float:
     Returns:
         float: The total amount of expenses for the specified month and year.
     """
-    total_expenses = 0.0
-    expenses = read_expenses()
-    
-    for expense in expenses:
-        try:
-            expense_date = datetime.strptime(expense["Date"], "%Y-%m-%d")
-            if expense_date.year == year and expense_date.month == month:
-                total_expenses += float(expense["Amount"])
-        except ValueError:
-            continue
-            
-    return total_expenses
+    return get_monthly_total(year, month)
 
 
 def check_budget_warning(year: int, month: int) -> str:
@@ -0,0 +1,417 @@
+import json
+import mmap
+import shutil
+from array import array
+from bisect import bisect_left
+from datetime import date
+from utils.data_manager import DATA_DIR, ExpenseStorage
+from utils.locking import atomic_write
+from utils.records import Expense
+
+
+COLUMNAR_DIR = DATA_DIR / "columnar"
+
+# Column files and their array typecodes. Descriptions are stored in a string heap
+# and "desc_index" holds an (offset, length) pair into it for every row.
+COLUMNS = {
+    "ids": "q",
+    "dates": "i",
+    "amounts": "q",
+    "categories": "B",
+    "deleted": "B",
+    "desc_index": "q",
+}
+HEAP_FILE = "descriptions.bin"
+CATEGORY_FILE = "categories.json"
+
+
+class ColumnarLedger:
+    """
+    Read-only, memory-mapped view of the columnar expense files.
+    IDs are integers, dates are day ordinals, amounts are integer cents and categories
+    are small integer codes. Use it as a context manager so the maps are released.
+    """
+
+    def __init__(self, directory=COLUMNAR_DIR):
+        self._maps = []
+        self._views = []
+        self.directory = directory
+        self.columns = {name: self._map(directory / f"{name}.bin", code) for name, code in COLUMNS.items()}
+        self.heap = self._map(directory / HEAP_FILE, "B")
+        self.categories = read_categories(directory)
+        self._dates = {}
+
+        # Rows are appended to every file in turn, so a partial append is ignored here
+        self.rows = min(
+            min(len(self.columns[name]) for name in COLUMNS if name != "desc_index"),
+            len(self.columns["desc_index"]) // 2,
+        )
+
+    def _map(self, path, typecode):
+        try:
+            file = path.open("rb")
+        except FileNotFoundError:
+            return memoryview(array(typecode))
+
+        with file:
+            size = path.stat().st_size
+            if size == 0:
+                return memoryview(array(typecode))
+            mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self._maps.append(mapped)
+        itemsize = array(typecode).itemsize
+        raw = memoryview(mapped)
+        view = raw[:len(mapped) - len(mapped) % itemsize].cast(typecode)
+        self._views.extend([raw, view])
+        return view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.columns = {}
+        self.heap = None
+        for view in reversed(self._views):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        self._views, self._maps = [], []
+
+    def find(self, expense_id: int):
+        """
+        Returns the row index of a live expense, found by bisecting the sorted ID column, or None.
+        """
+        ids = self.columns["ids"]
+        index = bisect_left(ids, expense_id, 0, self.rows)
+        if index < self.rows and ids[index] == expense_id and not self.columns["deleted"][index]:
+            return index
+        return None
+
+    def description(self, index: int) -> str:
+        desc_index = self.columns["desc_index"]
+        offset, length = desc_index[2 * index], desc_index[2 * index + 1]
+        return bytes(self.heap[offset:offset + length]).decode("utf-8")
+
+    def expense(self, index: int) -> dict:
+        """
+        Decodes a single row into the same dictionary of strings returned by the CSV reader.
+        """
+        cents = self.columns["amounts"][index]
+        return {
+            "ID": str(self.columns["ids"][index]),
+            "Date": date.fromordinal(self.columns["dates"][index]).isoformat(),
+            "Amount": f"{cents // 100}.{cents % 100:02d}",
+            "Category": self.categories[self.columns["categories"][index]],
+            "Description": self.description(index),
+        }
+
+    def record(self, index: int) -> Expense:
+        """
+        Decodes a single row into a typed Expense record, without going through strings.
+        """
+        ordinal = self.columns["dates"][index]
+        expense_date = self._dates.get(ordinal)
+        if expense_date is None:
+            expense_date = self._dates[ordinal] = date.fromordinal(ordinal)
+        return Expense(
+            self.columns["ids"][index],
+            expense_date,
+            self.columns["amounts"][index],
+            self.categories[self.columns["categories"][index]],
+            self.description(index),
+        )
+
+    def __iter__(self):
+        deleted = self.columns["deleted"]
+        for index in range(self.rows):
+            if not deleted[index]:
+                yield self.expense(index)
+
+    def select(self, category=None, start_date=None, end_date=None, min_amount=None, max_amount=None, decode=None):
+        """
+        Yields the live expenses that match every given filter. Filters are checked on the
+        raw columns (ordinals, cents, category codes) and only matching rows are decoded,
+        by default into dictionaries of strings.
+        """
+        decode = decode or self.expense
+        dates, amounts = self.columns["dates"], self.columns["amounts"]
+        codes, deleted = self.columns["categories"], self.columns["deleted"]
+
+        first_day = date.fromisoformat(start_date).toordinal() if start_date else None
+        last_day = date.fromisoformat(end_date).toordinal() if end_date else None
+        min_cents = round(min_amount * 100) if min_amount is not None else None
+        max_cents = round(max_amount * 100) if max_amount is not None else None
+        category_codes = None
+        if category:
+            category_codes = {
+                code for code, name in enumerate(self.categories)
+                if name.strip().lower() == category
+            }
+
+        for index in range(self.rows):
+            if deleted[index]:
+                continue
+            if category_codes is not None and codes[index] not in category_codes:
+                continue
+            if first_day is not None and dates[index] < first_day:
+                continue
+            if last_day is not None and dates[index] > last_day:
+                continue
+            if min_cents is not None and amounts[index] < min_cents:
+                continue
+            if max_cents is not None and amounts[index] > max_cents:
+                continue
+            yield decode(index)
+
+    def rollup(self):
+        """
+        Aggregates the ledger by month and category straight from the mapped columns.
+
+        Returns:
+            tuple: (highest ID, rollup) where the rollup maps "YYYY-MM" to {category: [cents, count]}.
+        """
+        ids, dates, amounts = self.columns["ids"], self.columns["dates"], self.columns["amounts"]
+        codes, deleted = self.columns["categories"], self.columns["deleted"]
+        month_keys = {}
+        totals = {}
+
+        for index in range(self.rows):
+            if deleted[index]:
+                continue
+            ordinal = dates[index]
+            month_key = month_keys.get(ordinal)
+            if month_key is None:
+                month_key = month_keys[ordinal] = date.fromordinal(ordinal).isoformat()[:7]
+            key = (month_key, codes[index])
+            total, count = totals.get(key, (0, 0))
+            totals[key] = (total + amounts[index], count + 1)
+
+        rollup = {}
+        for (month_key, code), (total, count) in sorted(totals.items()):
+            month_rollup = rollup.setdefault(month_key, {})
+            category_total, category_count = month_rollup.get(self.categories[code].capitalize(), (0, 0))
+            month_rollup[self.categories[code].capitalize()] = [category_total + total, category_count + count]
+
+        last_id = ids[self.rows - 1] if self.rows else 0
+        return last_id, rollup
+
+
+class ColumnarStorage(ExpenseStorage):
+    """
+    Storage backend for the columnar format in data/columnar.
+    Lookups bisect the sorted ID column, and queries and the rollup rebuild work on the
+    mapped columns without building a dictionary per row.
+    """
+
+    name = "columnar"
+
+    def initialize(self):
+        COLUMNAR_DIR.mkdir(parents=True, exist_ok=True)
+
+    def iter_expenses(self):
+        with ColumnarLedger() as ledger:
+            yield from ledger
+
+    def fingerprint(self):
+        return fingerprint()
+
+    def find(self, expense_id: int):
+        with ColumnarLedger() as ledger:
+            index = ledger.find(expense_id)
+            return ledger.expense(index) if index is not None else None
+
+    def query(self, query):
+        with ColumnarLedger() as ledger:
+            yield from ledger.select(**query.filters)
+
+    def query_records(self, query):
+        with ColumnarLedger() as ledger:
+            yield from ledger.select(**query.filters, decode=ledger.record)
+
+    def rollup(self):
+        with ColumnarLedger() as ledger:
+            return ledger.rollup()
+
+    def _append(self, expenses):
+        append_expenses(expenses)
+
+    def _update(self, expense):
+        update_expense(expense)
+
+    def _delete(self, expense_id: int):
+        delete_expense(expense_id)
+
+    def _clear(self):
+        clear()
+
+    def _compact(self) -> int:
+        return compact()
+
+    def remove(self):
+        shutil.rmtree(COLUMNAR_DIR, ignore_errors=True)
+
+
+def read_categories(directory=COLUMNAR_DIR):
+    try:
+        return json.loads((directory / CATEGORY_FILE).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+
+def _write_categories(categories, directory):
+    # Replaced in one step: readers don't take the lock and must never see a partial file
+    with atomic_write(directory / CATEGORY_FILE, encoding="utf-8") as file:
+        file.write(json.dumps(categories))
+
+
+def _encode_rows(expenses, categories):
+    """
+    Converts expense dictionaries into column arrays, extending the category code table as needed.
+    """
+    columns = {name: array(code) for name, code in COLUMNS.items()}
+    heap = bytearray()
+
+    for expense in expenses:
+        if expense["Category"] not in categories:
+            categories.append(expense["Category"])
+        encoded = expense["Description"].encode("utf-8")
+
+        columns["ids"].append(int(expense["ID"]))
+        columns["dates"].append(date.fromisoformat(expense["Date"]).toordinal())
+        columns["amounts"].append(round(float(expense["Amount"]) * 100))
+        columns["categories"].append(categories.index(expense["Category"]))
+        columns["deleted"].append(0)
+        columns["desc_index"].extend([len(heap), len(encoded)])
+        heap += encoded
+
+    return columns, heap
+
+
+def append_expenses(expenses, directory=COLUMNAR_DIR):
+    """
+    Appends expenses to the columnar files. Expenses must be given in increasing ID order.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    categories = read_categories(directory)
+    known_categories = len(categories)
+
+    heap_path = directory / HEAP_FILE
+    heap_offset = heap_path.stat().st_size if heap_path.exists() else 0
+    columns, heap = _encode_rows(expenses, categories)
+    for index in range(0, len(columns["desc_index"]), 2):
+        columns["desc_index"][index] += heap_offset
+
+    if len(categories) != known_categories:
+        _write_categories(categories, directory)
+
+    with heap_path.open("ab") as file:
+        file.write(heap)
+    for name, values in columns.items():
+        with (directory / f"{name}.bin").open("ab") as file:
+            values.tofile(file)
+
+
+def _patch(path, typecode, index, values):
+    itemsize = array(typecode).itemsize
+    with path.open("r+b") as file:
+        file.seek(index * itemsize)
+        array(typecode, values).tofile(file)
+
+
+def update_expense(expense, directory=COLUMNAR_DIR):
+    """
+    Updates a single expense in place. The fixed-width columns are patched and the
+    new description is appended to the string heap.
+
+    Returns:
+        bool: False if no live expense has that ID.
+    """
+    with ColumnarLedger(directory) as ledger:
+        index = ledger.find(int(expense["ID"]))
+    if index is None:
+        return False
+
+    categories = read_categories(directory)
+    if expense["Category"] not in categories:
+        categories.append(expense["Category"])
+        _write_categories(categories, directory)
+
+    heap_path = directory / HEAP_FILE
+    encoded = expense["Description"].encode("utf-8")
+    heap_offset = heap_path.stat().st_size
+    with heap_path.open("ab") as file:
+        file.write(encoded)
+
+    _patch(directory / "dates.bin", "i", index, [date.fromisoformat(expense["Date"]).toordinal()])
+    _patch(directory / "amounts.bin", "q", index, [round(float(expense["Amount"]) * 100)])
+    _patch(directory / "categories.bin", "B", index, [categories.index(expense["Category"])])
+    _patch(directory / "desc_index.bin", "q", 2 * index, [heap_offset, len(encoded)])
+    return True
+
+
+def delete_expense(expense_id: int, directory=COLUMNAR_DIR):
+    """
+    Marks a single expense as deleted.
+
+    Returns:
+        bool: False if no live expense has that ID.
+    """
+    with ColumnarLedger(directory) as ledger:
+        index = ledger.find(expense_id)
+    if index is None:
+        return False
+    _patch(directory / "deleted.bin", "B", index, [1])
+    return True
+
+
+def clear(directory=COLUMNAR_DIR):
+    """
+    Removes every expense, leaving an empty columnar ledger.
+    """
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True, exist_ok=True)
+
+
+def compact(directory=COLUMNAR_DIR) -> int:
+    """
+    Rewrites the columnar files without deleted rows or unused description bytes.
+    The new files are written to a temporary directory that replaces the old one.
+
+    Returns:
+        int: The number of deleted rows that were dropped.
+    """
+    with ColumnarLedger(directory) as ledger:
+        dropped = sum(ledger.columns["deleted"][:ledger.rows])
+        if not dropped and len(ledger.heap) == sum(ledger.columns["desc_index"][1:2 * ledger.rows:2]):
+            return 0
+        temp_dir = directory.with_name(directory.name + ".tmp")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        temp_dir.mkdir(parents=True)
+        (temp_dir / CATEGORY_FILE).write_text(json.dumps(ledger.categories), encoding="utf-8")
+        append_expenses(ledger, temp_dir)
+
+    old_dir = directory.with_name(directory.name + ".old")
+    directory.rename(old_dir)
+    temp_dir.rename(directory)
+    shutil.rmtree(old_dir)
+    return dropped
+
+
+def fingerprint(directory=COLUMNAR_DIR):
+    """
+    Returns the sizes and modification times of the columnar files, or None if the ledger doesn't exist.
+    """
+    if not directory.exists():
+        return None
+    fingerprint = []
+    for name in [*(f"{column}.bin" for column in COLUMNS), HEAP_FILE]:
+        try:
+            stat = (directory / name).stat()
+            fingerprint += [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            fingerprint += [0, 0]
+    return fingerprint
@@ -0,0 +1,147 @@
+import io
+import sys
+import json
+import socket
+import click
+from contextlib import redirect_stdout
+from styles.colors import console
+from utils.daemon_client import SOCKET_PATH, DAEMON_COMMANDS, command_name, connect
+from utils.data_manager import create_storage, get_storage_format, use_storage, defer_commits, commit_changes
+from utils.memory_store import MemoryStorage
+
+
+REQUEST_TIMEOUT = 5
+LISTEN_BACKLOG = 128
+
+
+class LedgerDaemon:
+    """
+    Local server that owns the ledger and the budgets in memory and runs the DAEMON_COMMANDS
+    for the CLI over a Unix socket, so they skip the startup and loading costs.
+
+    Requests are run one at a time, which serializes the writes. Requests that arrive while
+    a batch is being run are run together as the next batch, and their changes are flushed
+    to disk with a single commit (group commit) before any of them gets its reply.
+    """
+
+    def __init__(self, group: click.Group, prog_name: str, socket_path=SOCKET_PATH):
+        self.group = group
+        self.prog_name = prog_name
+        self.socket_path = socket_path
+        self.memory = None
+        self.running = False
+
+    def is_running(self) -> bool:
+        """
+        Checks whether another daemon is already listening on the socket.
+        """
+        client = connect(self.socket_path, REQUEST_TIMEOUT)
+        if client is None:
+            return False
+        client.close()
+        return True
+
+    def serve(self):
+        """
+        Loads the ledger and answers requests until a stop request arrives.
+        """
+        self.memory = MemoryStorage(create_storage(get_storage_format()))
+        self.memory.initialize()
+        self.memory.load()
+
+        self.socket_path.parent.mkdir(exist_ok=True)
+        self.socket_path.unlink(missing_ok=True)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stdin = sys.stdin
+        try:
+            server.bind(str(self.socket_path))
+            server.listen(LISTEN_BACKLOG)
+            # Commands can't prompt in the daemon: a prompt reads end of input and aborts
+            sys.stdin = io.StringIO()
+            defer_commits()
+            self.running = True
+            while self.running:
+                self._serve_batch(server)
+        finally:
+            commit_changes()
+            defer_commits(False)
+            sys.stdin = stdin
+            server.close()
+            self.socket_path.unlink(missing_ok=True)
+            use_storage(None)
+
+    def _serve_batch(self, server):
+        # Wait for a connection, then take every other one that's already waiting
+        connections = [server.accept()[0]]
+        server.setblocking(False)
+        try:
+            while True:
+                connections.append(server.accept()[0])
+        except BlockingIOError:
+            pass
+        finally:
+            server.setblocking(True)
+
+        replies = []
+        for connection in connections:
+            connection.settimeout(REQUEST_TIMEOUT)
+            try:
+                with connection.makefile("rb") as reader:
+                    request = json.loads(reader.readline())
+            except (OSError, ValueError):
+                connection.close()
+                continue
+            replies.append((connection, self.handle(request)))
+
+        commit_changes()
+        for connection, reply in replies:
+            try:
+                connection.sendall(json.dumps(reply).encode("utf-8") + b"\n")
+            except OSError:
+                pass
+            finally:
+                connection.close()
+
+    def handle(self, request: dict) -> dict:
+        """
+        Runs a request and returns the response: {"status": "ok", "output": ..., "errors": ...}
+        with the command's output for stdout and stderr, or {"status": "fallback"} if the client
+        has to run the command itself.
+        """
+        if request.get("stop"):
+            self.running = False
+            return {"status": "ok", "output": "", "errors": ""}
+
+        args = request.get("args") or []
+        if command_name(args) not in DAEMON_COMMANDS or "--help" in args:
+            return {"status": "fallback"}
+
+        # Follow a migration, and pick up changes made by other processes
+        if self.memory.backend.name != get_storage_format():
+            self.memory = MemoryStorage(create_storage(get_storage_format()))
+        self.memory.refresh()
+        use_storage(self.memory)
+
+        file, width, record = console.file, console.width, console.record
+        console.file = io.StringIO()
+        console.width = request.get("width") or width
+        console.record = True
+        stdout = io.StringIO()
+        try:
+            # Plain output formats are written to stdout and sent back; click also writes its
+            # prompts there, but a command that prompts is handed back to the client
+            with redirect_stdout(stdout):
+                self.group.main(args, prog_name=self.prog_name, standalone_mode=False)
+        except (click.ClickException, click.Abort):
+            # Usage errors and prompts are left to the client, which can show or ask for them
+            return {"status": "fallback"}
+        except Exception as e:
+            console.print(f"\n[error]Unexpected error:[/error] [white]{e}[/white]\n")
+        finally:
+            messages = console.export_text(styles=bool(request.get("color")))
+            # With the plain output formats, the console's messages belong on stderr
+            errors = messages if console.stderr else ""
+            output = stdout.getvalue() if console.stderr else messages + stdout.getvalue()
+            console.file, console.width, console.record, console.stderr = file, width, record, False
+            use_storage(None)
+        return {"status": "ok", "output": output, "errors": errors}
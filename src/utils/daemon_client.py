@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+
+# Kept free of the CLI's heavier imports (rich, the storage backends): it runs before every command.
+# The modules needed to talk to the daemon are imported only when its socket exists
+# Outside data/, whose files are flushed to disk after writes
+SOCKET_PATH = Path("run") / "daemon.sock"
+
+# Commands the daemon answers. The others always run in the calling process
+DAEMON_COMMANDS = {"add", "list", "summary", "set-budget", "delete-budget", "view-budget"}
+CLIENT_TIMEOUT = 30
+
+
+def command_name(args):
+    """
+    Returns the command in the CLI arguments, after the global options (--format), or None.
+    """
+    index = 0
+    while index < len(args) and args[index].startswith("--format"):
+        index += 1 if "=" in args[index] else 2
+    return args[index] if index < len(args) else None
+
+
+def connect(socket_path=SOCKET_PATH, timeout=CLIENT_TIMEOUT):
+    """
+    Connects to the daemon.
+
+    Returns:
+        socket.socket: The connection, or None if no daemon is listening on the socket.
+    """
+    import socket
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(timeout)
+    try:
+        client.connect(str(socket_path))
+    except (FileNotFoundError, ConnectionRefusedError):
+        # A socket file left behind by a daemon that didn't stop cleanly
+        client.close()
+        return None
+    return client
+
+
+def send_request(request: dict, socket_path=SOCKET_PATH, timeout=CLIENT_TIMEOUT):
+    """
+    Sends a request (one line of JSON) to the daemon and waits for its response.
+
+    Returns:
+        dict: The response, or None if no daemon is listening.
+
+    Raises:
+        OSError: If the daemon accepted the request but didn't answer.
+    """
+    import json
+    client = connect(socket_path, timeout)
+    if client is None:
+        return None
+    with client, client.makefile("rb") as reader:
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        line = reader.readline()
+    if not line:
+        raise ConnectionError("The daemon closed the connection without answering.")
+    return json.loads(line)
+
+
+def run_in_daemon(args) -> bool:
+    """
+    Runs a command in the daemon if it's running and answers that command, writing its output
+    to stdout. Commands the daemon can't answer without asking for input (e.g., a missing
+    option that would be prompted for) are handed back and run in this process.
+
+    Returns:
+        bool: True if the daemon ran the command, False if it should run in this process.
+    """
+    import shutil
+    if command_name(args) not in DAEMON_COMMANDS or "--help" in args:
+        return False
+    request = {"args": list(args), "width": shutil.get_terminal_size().columns, "color": sys.stdout.isatty()}
+    try:
+        response = send_request(request)
+    except (OSError, ValueError) as e:
+        # The request may have been applied, so it isn't run again here
+        sys.stderr.write(f"Error: no answer from the expense tracker daemon ({e}). Check the ledger before retrying.\n")
+        sys.exit(1)
+
+    if response is None or response.get("status") != "ok":
+        return False
+    sys.stdout.write(response["output"])
+    sys.stdout.flush()
+    sys.stderr.write(response.get("errors", ""))
+    return True
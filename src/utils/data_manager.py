@@ -1,65 +1,650 @@
+import io
 import csv
-from datetime import datetime
+import heapq
+import json
+import hashlib
+from datetime import date
 from typing import Dict
 from pathlib import Path
 from collections import defaultdict
+from contextlib import contextmanager
 from styles.colors import console
+from utils.query_engine import ExpenseQuery, scan, is_valid_row
+from utils.records import Expense, as_row, parse_date
+from utils.ledger_index import DateIndex, IdIndex, decode_row, file_identity, file_stamp, read_raw_row
+from utils.locking import FileLock, GroupCommit, atomic_write
 
 
 DATA_DIR = Path("data")
 CSV_FILE_PATH = DATA_DIR / "expenses.csv"
 FIELD_NAMES = ["ID", "Date", "Amount", "Category", "Description"]
+JOURNAL_FILE_PATH = DATA_DIR / "expenses_journal.csv"
+JOURNAL_FIELD_NAMES = ["Op"] + FIELD_NAMES
+META_FILE_PATH = DATA_DIR / "ledger_meta.json"
+CHANGE_LOG_PATH = DATA_DIR / "change_log.csv"
+CONFIG_FILE_PATH = DATA_DIR / "config.json"
+LOCK_FILE_PATH = DATA_DIR / "ledger.lock"
+COMMIT_FILE_PATH = DATA_DIR / "ledger_commit.json"
+STORAGE_FORMATS = ["csv", "columnar", "sqlite", "partitioned"]
 
+# Bytes before the end of the CSV file that the metadata snapshot checks, to detect a rewrite
+SNAPSHOT_TAIL_BYTES = 4096
+PARTITION_SCHEMES = ["year", "month"]
 
-def initialize_csv():
+
+class ExpenseStorage:
+    """
+    Base class of the ledger storage backends.
+
+    Backends implement the primitive operations (reading, appending, updating, deleting).
+    The public methods wrap them to keep the ledger metadata (ID high-water mark and rollup)
+    in sync. Backends that can filter and aggregate natively override query(), summarize()
+    and the other read helpers, and set maintains_rollup to False.
+    """
+
+    name = None
+    maintains_rollup = True
+
+    # Backend primitives
+
+    def initialize(self):
+        """Creates the storage files if they don't exist."""
+        raise NotImplementedError
+
+    def iter_expenses(self):
+        """Yields every expense as a dictionary of strings keyed by FIELD_NAMES."""
+        raise NotImplementedError
+
+    def fingerprint(self):
+        """Returns a value that changes whenever the stored ledger changes, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def _append(self, expenses):
+        raise NotImplementedError
+
+    def _update(self, expense):
+        raise NotImplementedError
+
+    def _delete(self, expense_id: int):
+        raise NotImplementedError
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _compact(self) -> int:
+        return 0
+
+    def remove(self):
+        """Deletes the storage files. Used when the ledger is migrated to another format."""
+        raise NotImplementedError
+
+    # Reads
+
+    def find(self, expense_id: int):
+        for expense in self.iter_expenses():
+            if expense["ID"] == str(expense_id):
+                return expense
+        return None
+
+    def query(self, query: ExpenseQuery):
+        """
+        Yields the expenses that match a query, streaming them through the query engine.
+        """
+        return scan(self.iter_expenses(), query)
+
+    def query_records(self, query: ExpenseQuery):
+        """
+        Yields the expenses that match a query as typed Expense records.
+        Rows are rejected on their raw strings before being decoded, and each row is
+        decoded only once. Rows that can't be decoded are skipped.
+        """
+        return _decode_matches(self.iter_expenses(), query)
+
+    def rollup(self):
+        """
+        Aggregates the whole ledger by month and category.
+
+        Returns:
+            tuple: (highest ID, rollup) where the rollup maps "YYYY-MM" to {category: [cents, count]}.
+        """
+        meta = {"last_id": 0, "rollup": {}}
+        for expense in self.iter_expenses():
+            _apply_to_meta(meta, expense)
+        return meta["last_id"], meta["rollup"]
+
+    def snapshot(self):
+        """
+        Returns the state of the stored files that catch_up() needs, saved with the ledger
+        metadata, or None if the backend can't bring the metadata up to date incrementally.
+        """
+        return None
+
+    def catch_up(self, meta) -> bool:
+        """
+        Brings metadata saved for an earlier state of the ledger up to date without a full
+        scan, when the ledger only grew since then.
+
+        Returns:
+            bool: False if the metadata has to be rebuilt from the whole ledger.
+        """
+        return False
+
+    def next_id(self) -> int:
+        return read_ledger_meta()["last_id"] + 1
+
+    def reserve_ids(self, last_id: int):
+        """
+        Makes sure IDs up to last_id are never handed out, e.g., IDs of expenses deleted
+        before a migration. The highest ID ever used is kept in the ledger metadata.
+        """
+        meta = read_ledger_meta()
+        if meta["last_id"] < last_id:
+            meta["last_id"] = last_id
+            save_ledger_meta(meta)
+
+    def monthly_totals(self) -> Dict[str, float]:
+        return {
+            month_key: sum(total for total, _ in categories.values()) / 100
+            for month_key, categories in read_ledger_meta()["rollup"].items()
+        }
+
+    def summarize(self, target_year=None, target_month=None, target_category=None):
+        return _summarize_rollup(read_ledger_meta()["rollup"], target_year, target_month, target_category)
+
+    # Writes
+
+    def add(self, expenses):
+        with ledger_lock():
+            meta = read_ledger_meta() if self.maintains_rollup else None
+            self._append(expenses)
+            log_changes("A", expenses)
+            if meta is not None:
+                for expense in expenses:
+                    _apply_to_meta(meta, expense)
+                save_ledger_meta(meta)
+
+    def update(self, old_expense, new_expense):
+        with ledger_lock():
+            meta = read_ledger_meta() if self.maintains_rollup else None
+            # The stored version, in case another process changed it since the caller read it
+            old_expense = self.find(int(new_expense["ID"])) or old_expense
+            self._update(new_expense)
+            log_changes("U", [new_expense])
+            if meta is not None:
+                record_expense_change(meta, old_expense=old_expense, new_expense=new_expense)
+                save_ledger_meta(meta)
+
+    def delete(self, expense):
+        with ledger_lock():
+            meta = read_ledger_meta() if self.maintains_rollup else None
+            expense = self.find(int(expense["ID"])) or expense
+            self._delete(int(expense["ID"]))
+            log_changes("D", [{"ID": expense["ID"]}])
+            if meta is not None:
+                record_expense_change(meta, old_expense=expense)
+                save_ledger_meta(meta)
+
+    def clear(self):
+        with ledger_lock():
+            meta = read_ledger_meta() if self.maintains_rollup else None
+            log_changes("D", [{"ID": expense["ID"]} for expense in self.iter_expenses()])
+            self._clear()
+            if meta is not None:
+                meta["rollup"] = {}
+                save_ledger_meta(meta)
+
+    def compact(self) -> int:
+        with ledger_lock():
+            meta = read_ledger_meta() if self.maintains_rollup else None
+            compacted = self._compact()
+            if meta is not None:
+                save_ledger_meta(meta)
+            return compacted
+
+
+def _id_order(row):
+    try:
+        return int(row["ID"])
+    except (KeyError, ValueError):
+        return 0
+
+
+def _decode_matches(rows, query: ExpenseQuery):
+    """
+    Decodes the rows that match a query into Expense records, checking the raw strings first.
+    """
+    for row in rows:
+        try:
+            if not query.matches_raw(row):
+                continue
+            record = Expense.from_row(row)
+        except (ValueError, OverflowError, TypeError, AttributeError):
+            continue
+        if query.matches_cents(record.cents):
+            yield record
+
+
+class CsvStorage(ExpenseStorage):
+    """
+    The default storage: a CSV file plus an append-only journal of updates and deletions
+    that readers merge on load and the compact command folds into the CSV file.
+
+    Queries with a date range go through a persisted date index (data/expenses_date.idx)
+    and only read the rows in the range, and lookups by ID go through an ID index
+    (data/expenses_id.idx) that gives the offset of the row. Appends are added to both
+    indexes; updates and deletions don't move rows in the CSV file, so they are overlaid
+    from the journal.
+    """
+
+    name = "csv"
+
+    def __init__(self, csv_path=CSV_FILE_PATH):
+        # The journal and the indexes are named after the CSV file (e.g., expenses_journal.csv)
+        self.csv_path = csv_path
+        self.journal_path = csv_path.with_name(f"{csv_path.stem}_journal.csv")
+        self.date_index = DateIndex(csv_path.with_name(f"{csv_path.stem}_date.idx"), csv_path)
+        self.id_index = IdIndex(csv_path.with_name(f"{csv_path.stem}_id.idx"), csv_path)
+        self.indexes = [self.date_index, self.id_index]
+
+    def initialize(self):
+        initialize_csv(self.csv_path)
+
+    def iter_expenses(self):
+        changes = _read_journal(self.journal_path)
+        try:
+            with self.csv_path.open("r", newline="", encoding="utf-8") as file:
+                for row in csv.DictReader(file):
+                    if row["ID"] in changes:
+                        row = changes[row["ID"]]
+                        if row is None:
+                            continue
+                    yield row
+        except FileNotFoundError:
+            return
+
+    def rollup(self):
+        # The file is scanned from its raw bytes, and large files are split into byte
+        # ranges that a pool of worker processes aggregates
+        from utils.parallel_scan import PARALLEL_MIN_BYTES, default_workers, parallel_rollup
+        size = file_stamp(self.csv_path)[0]
+        if size == 0:
+            return super().rollup()
+        workers = default_workers() if size >= PARALLEL_MIN_BYTES else 1
+        return parallel_rollup(self.csv_path, _read_journal(self.journal_path), workers)
+
+    def _read_ends(self, size: int):
+        """
+        Returns the header line and the last SNAPSHOT_TAIL_BYTES bytes before an offset.
+        """
+        with self.csv_path.open("rb") as file:
+            header = file.readline()
+            file.seek(max(size - SNAPSHOT_TAIL_BYTES, 0))
+            return header, file.read(min(size, SNAPSHOT_TAIL_BYTES))
+
+    def snapshot(self):
+        size = file_stamp(self.csv_path)[0]
+        if size == 0:
+            return None
+        header, tail = self._read_ends(size)
+        return {"size": size, "header": _digest(header), "tail": _digest(tail), "journal": list(file_stamp(self.journal_path))}
+
+    def catch_up(self, meta) -> bool:
+        # Only rows appended after the snapshot (e.g., by another program) are scanned. The file
+        # must have grown, with the header, the bytes before the old end and the journal unchanged
+        snapshot = meta.get("snapshot")
+        size = file_stamp(self.csv_path)[0]
+        if not snapshot or size <= snapshot["size"] or list(file_stamp(self.journal_path)) != snapshot["journal"]:
+            return False
+        header, tail = self._read_ends(snapshot["size"])
+        if _digest(header) != snapshot["header"] or _digest(tail) != snapshot["tail"] or not tail.endswith(b"\n"):
+            return False
+        if decode_row(header) != FIELD_NAMES:
+            return False
+
+        from utils.fast_scan import scan_rollup
+        from utils.parallel_scan import merge_rollups
+        merge_rollups(meta, scan_rollup(self.csv_path, _read_journal(self.journal_path), start=snapshot["size"]))
+        return True
+
+    def find(self, expense_id: int):
+        changes = _read_journal(self.journal_path)
+        if str(expense_id) in changes:
+            return changes[str(expense_id)]
+
+        self._ensure_current(self.id_index)
+        offset = self.id_index.offset_of(expense_id)
+        if offset is None:
+            return None
+        with self.csv_path.open("rb") as file:
+            row = dict(zip(FIELD_NAMES, decode_row(read_raw_row(file, offset))))
+        return row if row.get("ID") == str(expense_id) else None
+
+    def _ensure_current(self, index):
+        """
+        Rebuilds a stale index. The rebuild holds the write lock, so it can't interleave with
+        an append adding its rows to the same index.
+        """
+        if not index.is_current():
+            with ledger_lock():
+                index.ensure_current()
+
+    def _date_range(self, query: ExpenseQuery):
+        """
+        Returns the query's date range as day ordinals, or None if it has no valid date range.
+        """
+        if not (query.start_date or query.end_date):
+            return None
+        try:
+            first = parse_date(query.start_date).toordinal() if query.start_date else 1
+            last = parse_date(query.end_date).toordinal() if query.end_date else date.max.toordinal()
+        except ValueError:
+            return None
+        return first, last
+
+    def _range_rows(self, first: int, last: int):
+        """
+        Yields the expenses dated in a range of day ordinals (and any updated in the journal),
+        seeking to each row through the date index. Rows come out in ID order.
+        """
+        self._ensure_current(self.date_index)
+        offsets = self.date_index.offsets_between(first, last)
+        changes = _read_journal(self.journal_path)
+
+        def base_rows():
+            if not offsets:
+                return
+            with self.csv_path.open("rb") as file:
+                for offset in offsets:
+                    row = dict(zip(FIELD_NAMES, decode_row(read_raw_row(file, offset))))
+                    if row.get("ID") not in changes:
+                        yield row
+
+        # Rows are kept in ID order (see _insert()), so the base rows (in file order) are merged
+        # with the updated rows, which may have moved into the range; the scan filters those by date
+        updated_rows = sorted((row for row in changes.values() if row is not None), key=_id_order)
+        return heapq.merge(base_rows(), updated_rows, key=_id_order)
+
+    def query(self, query: ExpenseQuery):
+        date_range = self._date_range(query)
+        if date_range is None:
+            return super().query(query)
+        return scan(self._range_rows(*date_range), query)
+
+    def query_records(self, query: ExpenseQuery):
+        date_range = self._date_range(query)
+        if date_range is not None:
+            yield from _decode_matches(self._range_rows(*date_range), query)
+            return
+
+        # Decode straight from the CSV fields, without building a dictionary per row
+        changes = _read_journal(self.journal_path)
+        try:
+            with self.csv_path.open("r", newline="", encoding="utf-8") as file:
+                reader = csv.reader(file)
+                next(reader, None)
+                for fields in reader:
+                    if changes and fields and fields[0] in changes:
+                        row = changes[fields[0]]
+                        if row is None:
+                            continue
+                        fields = [row[name] for name in FIELD_NAMES]
+                    try:
+                        expense_id, expense_date, amount, category, description = fields
+                        if not query.matches_fields(expense_date, category):
+                            continue
+                        record = Expense(int(expense_id), parse_date(expense_date), round(float(amount) * 100), category, description)
+                    except (ValueError, OverflowError, TypeError, AttributeError):
+                        continue
+                    if query.matches_cents(record.cents):
+                        yield record
+        except FileNotFoundError:
+            return
+
+    def fingerprint(self):
+        try:
+            stat = self.csv_path.stat()
+        except FileNotFoundError:
+            return None
+        fingerprint = [stat.st_size, stat.st_mtime_ns]
+        try:
+            stat = self.journal_path.stat()
+            fingerprint += [stat.st_size, stat.st_mtime_ns]
+        except FileNotFoundError:
+            pass
+        return fingerprint
+
+    def _append(self, expenses):
+        current_indexes = [index for index in self.indexes if index.is_current()]
+        offset = file_stamp(self.csv_path)[0]
+
+        # Encode the rows first to know the offset of each one in the file
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=FIELD_NAMES)
+        if not self.csv_path.exists():
+            writer.writeheader()
+        chunks, date_entries, id_entries = [], [], []
+        for expense in expenses:
+            chunks.append(buffer.getvalue().encode("utf-8"))
+            offset += len(chunks[-1])
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerow(expense)
+            try:
+                date_entries.append((parse_date(expense["Date"]).toordinal(), offset))
+            except ValueError:
+                pass
+            try:
+                id_entries.append((int(expense["ID"]), offset))
+            except ValueError:
+                pass
+        chunks.append(buffer.getvalue().encode("utf-8"))
+
+        self.csv_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.csv_path.open("ab") as file:
+            file.write(b"".join(chunks))
+        # Indexes that were stale before the append are rebuilt when they are next used
+        if self.date_index in current_indexes:
+            self.date_index.add(date_entries)
+        if self.id_index in current_indexes:
+            self.id_index.add(id_entries)
+
+    def _insert(self, expense):
+        """
+        Adds an expense whose ID can be lower than the last one in the file (e.g., an expense
+        moved into another partition). It is appended if it goes last; otherwise the file is
+        rewritten with the journal folded in and the expense in its place by ID, since date
+        range queries rely on the rows being in ID order.
+        """
+        self._ensure_current(self.id_index)
+        if int(expense["ID"]) > self.id_index.last_id():
+            self._append([expense])
+            return
+
+        expenses = sorted([*self.iter_expenses(), expense], key=_id_order)
+        with atomic_write(self.csv_path, newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+            writer.writeheader()
+            writer.writerows(expenses)
+        self.journal_path.unlink(missing_ok=True)
+        for index in self.indexes:
+            index.rebuild()
+
+    def _update(self, expense):
+        _append_journal("U", expense, self.journal_path)
+
+    def _delete(self, expense_id: int):
+        _append_journal("D", {"ID": str(expense_id)}, self.journal_path)
+
+    def _clear(self):
+        with atomic_write(self.csv_path, newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+            writer.writeheader()
+        self.journal_path.unlink(missing_ok=True)
+        for index in self.indexes:
+            index.rebuild()
+
+    def _compact(self) -> int:
+        changes = _read_journal(self.journal_path)
+        if not changes:
+            return 0
+
+        with atomic_write(self.csv_path, newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+            writer.writeheader()
+            writer.writerows(self.iter_expenses())
+        self.journal_path.unlink()
+        for index in self.indexes:
+            index.rebuild()
+        return len(changes)
+
+    def remove(self):
+        self.csv_path.unlink(missing_ok=True)
+        self.journal_path.unlink(missing_ok=True)
+        for index in self.indexes:
+            index.index_path.unlink(missing_ok=True)
+
+
+def _read_config():
+    try:
+        return json.loads(CONFIG_FILE_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def get_storage_format() -> str:
+    """
+    Returns the storage format of the ledger (one of STORAGE_FORMATS), as set by the migrate command.
+    """
+    return _read_config().get("storage", "csv")
+
+
+def get_partition_scheme() -> str:
+    """
+    Returns how the partitioned format splits the ledger: by "year" (default) or by "month".
+    """
+    return _read_config().get("partition_by", "year")
+
+
+def set_storage_format(storage_format: str, partition_by: str = None):
+    """
+    Saves the storage format of the ledger (and the partition scheme, if any) in the config file.
+    """
+    config = {"storage": storage_format}
+    if partition_by:
+        config["partition_by"] = partition_by
+    with atomic_write(CONFIG_FILE_PATH, encoding="utf-8") as file:
+        file.write(json.dumps(config, indent=4))
+
+
+def is_storage_format(storage_format: str, partition_by: str = None) -> bool:
+    """
+    Checks whether the ledger is already stored in a format (and, for the partitioned
+    format, split by the given scheme, if any).
+    """
+    if get_storage_format() != storage_format:
+        return False
+    return storage_format != "partitioned" or partition_by in (None, get_partition_scheme())
+
+
+def create_storage(storage_format: str, partition_by: str = None) -> ExpenseStorage:
+    """
+    Creates the storage backend for a storage format.
+    The columnar, SQLite and partitioned backends are only imported when they are used.
+    The partition scheme defaults to the one in the config file.
+    """
+    if storage_format == "columnar":
+        from utils.columnar_store import ColumnarStorage
+        return ColumnarStorage()
+    if storage_format == "sqlite":
+        from utils.sqlite_store import SqliteStorage
+        return SqliteStorage()
+    if storage_format == "partitioned":
+        from utils.partitioned_store import PartitionedStorage
+        return PartitionedStorage(scheme=partition_by)
+    return CsvStorage()
+
+
+_storage_cache = {}
+
+# Storage that replaces the configured one, set by the interactive shell
+_active_storage = None
+
+
+def get_storage() -> ExpenseStorage:
+    """
+    Returns the storage backend of the ledger. Every command reads and writes expenses through it.
+    """
+    if _active_storage is not None:
+        return _active_storage
+    storage_format = get_storage_format()
+    if storage_format not in _storage_cache:
+        _storage_cache[storage_format] = create_storage(storage_format)
+    return _storage_cache[storage_format]
+
+
+def use_storage(storage):
+    """
+    Makes every command read and write through the given storage instead of the configured
+    backend, until it is called again with None. Used by the interactive shell.
+    """
+    global _active_storage
+    _active_storage = storage
+
+
+def initialize_csv(csv_path=CSV_FILE_PATH):
     """
     Initializes the expenses CSV file and ensures correct headers.
+    Only used by the CSV storage format; see initialize_storage() for the others.
     Creates the data directory and CSV file if they don't exist.
     If the file exists, validates and corrects headers if necessary.
+
+    Args:
+        csv_path (Path, optional): The CSV file. Defaults to data/expenses.csv.
     """
     try:
-        CSV_FILE_PATH.parent.mkdir(exist_ok=True)
-        if not CSV_FILE_PATH.exists():
-            with CSV_FILE_PATH.open("w", newline="", encoding="utf-8") as file:
+        csv_path.parent.mkdir(exist_ok=True)
+        try:
+            # Exclusive creation, so a file just created (and written) by another process is kept
+            with csv_path.open("x", newline="", encoding="utf-8") as file:
                 writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
                 writer.writeheader()
             return
+        except FileExistsError:
+            pass
+
+        # Only the first line is needed to decide whether the header is valid
+        with csv_path.open("r", newline="", encoding="utf-8") as file:
+            first_line = file.readline()
+
+        first_row = next(csv.reader([first_line]), None)
+        if first_row == FIELD_NAMES:
+            return
 
-        # Read first line to check if it's a valid header or data
+        # Missing or malformed header: read the whole file once to fix it
         file_content = []
-        headers_needed = False
 
-        with CSV_FILE_PATH.open("r", newline="", encoding="utf-8") as file:
+        with csv_path.open("r", newline="", encoding="utf-8") as file:
             reader = csv.reader(file)
-            try:
-                first_row = next(reader)
-                # Check if first row is data (has numeric ID) or malformed header
+            if first_row:
+                next(reader, None)
+                # Keep the first row if it is data (has numeric ID)
                 try:
                     int(first_row[0])
                     file_content.append(first_row)
-                    headers_needed = True
                 except (ValueError, IndexError):
-                    # Not a numeric ID, check if it's the correct header
-                    if first_row != FIELD_NAMES:
-                        headers_needed = True
-            except StopIteration:
-                headers_needed = True
-
-            # Read the rest of the file if it exists
+                    pass
             file_content.extend(row for row in reader if row)
 
-        # Only rewrite the file if we need to add/fix headers
-        if headers_needed:
-            with CSV_FILE_PATH.open("w", newline="", encoding="utf-8") as file:
-                writer = csv.writer(file)
-                writer.writerow(FIELD_NAMES)
-                writer.writerows(file_content)
+        with ledger_lock(), atomic_write(csv_path, newline="", encoding="utf-8") as file:
+            writer = csv.writer(file)
+            writer.writerow(FIELD_NAMES)
+            writer.writerows(file_content)
   
     except Exception as e:
         console.print(f"[error]Error initializing CSV file:[/error] [white]{e}[/white]")
         # Ensure the file exists with correct headers even after error
         try:
-            with CSV_FILE_PATH.open("w", newline="", encoding="utf-8") as file:
+            with csv_path.open("w", newline="", encoding="utf-8") as file:
                 writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
                 writer.writeheader()
         except Exception as e:
@@ -67,33 +652,379 @@ def initialize_csv():
             raise
 
 
-def read_expenses():
+def initialize_storage():
+    """
+    Initializes the ledger storage, creating its files if they don't exist.
     """
-    Reads all expense entries from the CSV file.
+    get_storage().initialize()
+
+
+# Expenses read by read_expenses(), by storage format and kind, with the fingerprint of the storage they match
+_expenses_cache = {}
+
+
+def read_expenses(as_records: bool = False):
+    """
+    Reads all expense entries from the ledger.
+    They are kept in memory, and only read again once the ledger changes.
+
+    Args:
+        as_records (bool, optional): Return typed Expense records instead of dictionaries.
+                                     Rows with invalid data are skipped. Defaults to False.
     
     Returns:
-        list: List of dictionaries with expense data.
+        list: List of dictionaries (or Expense records) with expense data.
     """
-    expenses = []
+    storage = get_storage()
+    fingerprint = storage.fingerprint()
+    key = (storage.name, as_records)
+    cached = _expenses_cache.get(key)
+    if cached is None or cached[0] != fingerprint or fingerprint is None:
+        cached = _expenses_cache[key] = (fingerprint, list(iter_records()) if as_records else list(iter_expenses()))
+
+    # Copies, so callers can change them without changing the cached ones
+    if as_records:
+        return [record.copy() for record in cached[1]]
+    return [dict(expense) for expense in cached[1]]
+
+
+def iter_records():
+    """
+    Yields every valid expense as a typed Expense record, decoded once at load.
+    """
+    return get_storage().query_records(ExpenseQuery())
+
+
+def iter_expenses():
+    """
+    Yields expense entries one at a time from the ledger.
+
+    Yields:
+        dict: Expense data, in storage order.
+    """
+    return get_storage().iter_expenses()
+
+
+def query_expenses(category=None, start_date=None, end_date=None, min_amount=None, max_amount=None, year=None, month=None):
+    """
+    Yields the expenses that match every given filter. Filtering is pushed down to the storage backend.
+
+    Args:
+        category (str, optional): Category to match, case-insensitively.
+        start_date (str, optional): Earliest date ('YYYY-MM-DD'), inclusive.
+        end_date (str, optional): Latest date ('YYYY-MM-DD'), inclusive.
+        min_amount (float, optional): Minimum amount, inclusive.
+        max_amount (float, optional): Maximum amount, inclusive.
+        year (int, optional): Year to match. Narrows the date range.
+        month (int, optional): Month (1-12) to match within the year. Requires year.
+
+    Yields:
+        dict: Expense data.
+    """
+    return get_storage().query(ExpenseQuery(
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        year=year,
+        month=month,
+    ))
+
+
+def query_records(category=None, start_date=None, end_date=None, min_amount=None, max_amount=None, year=None, month=None):
+    """
+    Same as query_expenses, but yields typed Expense records.
+    """
+    return get_storage().query_records(ExpenseQuery(
+        category=category,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        year=year,
+        month=month,
+    ))
+
+
+def has_expenses() -> bool:
+    """
+    Checks whether the ledger contains at least one expense, reading only up to the first one.
+    """
+    return next(iter_expenses(), None) is not None
+
+
+def _read_journal(journal_path=JOURNAL_FILE_PATH):
+    """
+    Reads the change journal of a CSV storage.
+
+    Returns:
+        dict: The latest change for each expense ID, mapping the ID to the updated
+              expense or to None if the expense was deleted.
+    """
+    changes = {}
     try:
-        with CSV_FILE_PATH.open("r", newline="", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            expenses = list(reader)
+        with journal_path.open("r", newline="", encoding="utf-8") as file:
+            for entry in csv.DictReader(file):
+                op = entry.pop("Op")
+                changes[entry["ID"]] = entry if op == "U" else None
     except FileNotFoundError:
         pass
-    return expenses
+    return changes
+
+
+def _append_journal(op: str, expense: Dict[str, str], journal_path=JOURNAL_FILE_PATH):
+    """
+    Appends a single change ("U" for update, "D" for delete) to the journal.
+    """
+    write_header = not journal_path.exists()
+    with journal_path.open("a", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=JOURNAL_FIELD_NAMES)
+        if write_header:
+            writer.writeheader()
+        writer.writerow({"Op": op, **expense})
+
+
+def log_changes(op: str, expenses):
+    """
+    Appends changes to the change log ("A" for add, "U" for update, "D" for delete), which
+    incremental exports read from the position where their previous run stopped.
+    Unlike the journal, the change log is used by every storage format and never compacted.
+    """
+    if not expenses:
+        return
+    CHANGE_LOG_PATH.parent.mkdir(exist_ok=True)
+    write_header = not CHANGE_LOG_PATH.exists()
+    with CHANGE_LOG_PATH.open("a", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=JOURNAL_FIELD_NAMES, extrasaction="ignore")
+        if write_header:
+            writer.writeheader()
+        writer.writerows({"Op": op, **expense} for expense in expenses)
+        file.flush()
+        _mark_for_commit(file.tell())
+
+
+def change_log_position() -> int:
+    """
+    Returns the current end of the change log, to be used as a position for read_changes().
+    """
+    return file_stamp(CHANGE_LOG_PATH)[0]
+
+
+def read_changes(start: int, end: int):
+    """
+    Reads the change log between two positions (byte offsets).
+
+    Returns:
+        tuple: (changes, added) where changes maps each expense ID changed in that part of the
+               log to its latest version, or to None if the expense was deleted, in order of
+               first change; and added is the set of IDs whose expense was added in it.
+    """
+    changes, added = {}, set()
+    try:
+        with CHANGE_LOG_PATH.open("rb") as file:
+            file.seek(start)
+            text = file.read(max(end - start, 0)).decode("utf-8")
+    except FileNotFoundError:
+        return changes, added
+
+    for entry in csv.DictReader(io.StringIO(text, newline=""), fieldnames=JOURNAL_FIELD_NAMES):
+        op = entry.pop("Op")
+        if op == "Op":
+            continue
+        if op == "A" and entry["ID"] not in changes:
+            added.add(entry["ID"])
+        changes[entry["ID"]] = entry if op in ("A", "U") else None
+    return changes, added
+
+
+_ledger_lock = FileLock(LOCK_FILE_PATH)
+_group_commit = GroupCommit(COMMIT_FILE_PATH, DATA_DIR, change_log_position)
+
+# End of the change log after this process's last uncommitted write, and whether commits wait for commit_changes()
+_pending_commit = None
+_commits_deferred = False
+
+
+def _mark_for_commit(position: int):
+    global _pending_commit
+    _pending_commit = position
+
+
+@contextmanager
+def ledger_lock():
+    """
+    Holds the ledger's write lock: an advisory lock on data/ledger.lock, shared with every
+    other process. Reading and then writing the ledger (e.g., taking the next ID and saving
+    the expense) must happen inside it. It can be nested.
+
+    When the outermost block exits after writing, the lock is released and the changes are
+    flushed to disk with a group commit, unless commits were deferred.
+    """
+    _ledger_lock.acquire()
+    try:
+        yield
+    finally:
+        _ledger_lock.release()
+    if _ledger_lock.depth == 0 and not _commits_deferred:
+        commit_changes()
+
+
+def commit_changes():
+    """
+    Flushes this process's written changes to disk. Concurrent writers share the flush:
+    if another process's commit already covered them, nothing is flushed again.
+    """
+    global _pending_commit
+    if _pending_commit is None:
+        return
+    position, _pending_commit = _pending_commit, None
+    _group_commit.commit(position)
+
+
+def defer_commits(deferred: bool = True):
+    """
+    Stops flushing the changes when each write ends, until called with False. Used by the
+    daemon, which calls commit_changes() once for each batch of requests.
+    """
+    global _commits_deferred
+    _commits_deferred = deferred
+
+
+def find_expense(expense_id: int):
+    """
+    Finds an expense by its ID.
+
+    Returns:
+        dict: The expense data, or None if no expense has that ID.
+    """
+    return get_storage().find(expense_id)
+
+
+def find_record(expense_id: int):
+    """
+    Finds an expense by its ID.
+
+    Returns:
+        Expense: The expense record, or None if no valid expense has that ID.
+    """
+    expense = find_expense(expense_id)
+    try:
+        return Expense.from_row(expense) if expense is not None else None
+    except (ValueError, OverflowError):
+        return None
 
 
 def save_expense(expense: Dict[str, str]):
     """
-    Saves a single expense entry to the CSV file.
+    Saves a single expense entry to the ledger.
+    Keeps the ledger metadata (last ID and rollup) in sync with the new row.
+
+    Args:
+        expense (Expense or Dict[str, str]): The expense record, or a dictionary with keys corresponding to FIELD_NAMES.
+    """
+    get_storage().add([as_row(expense)])
+
+
+def save_expenses(expenses):
+    """
+    Saves many expense entries to the ledger in a single append, updating the ledger
+    metadata once. Used by the import command.
 
     Args:
-        expense (Dict[str, str]): A dictionary representing the expense with keys corresponding to FIELD_NAMES.
+        expenses (list of Expense or Dict[str, str]): The expenses, with their IDs already assigned.
+    """
+    get_storage().add([as_row(expense) for expense in expenses])
+
+
+def update_expense_record(old_expense: Dict[str, str], new_expense: Dict[str, str]):
     """
-    with CSV_FILE_PATH.open("a", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
-        writer.writerow(expense)
+    Saves an edited expense. The CSV storage records it as a single journal entry
+    instead of rewriting the file.
+
+    Args:
+        old_expense (Expense or Dict[str, str]): The expense as it was before the edit.
+        new_expense (Expense or Dict[str, str]): The edited expense, with the same ID.
+    """
+    get_storage().update(as_row(old_expense), as_row(new_expense))
+
+
+def delete_expense_record(expense: Dict[str, str]):
+    """
+    Deletes a single expense. The CSV storage records it as a tombstone in the journal
+    instead of rewriting the file.
+
+    Args:
+        expense (Expense or Dict[str, str]): The expense to delete.
+    """
+    get_storage().delete(as_row(expense))
+
+
+def delete_all_expenses():
+    """
+    Deletes every expense.
+    The ID high-water mark is kept so deleted IDs are never reused.
+    """
+    get_storage().clear()
+
+
+def compact_expenses() -> int:
+    """
+    Compacts the ledger. The CSV storage folds the journal into the CSV file, and the
+    columnar storage drops deleted rows.
+
+    Returns:
+        int: The number of changes that were folded.
+    """
+    return get_storage().compact()
+
+
+def migrate_storage(target_format: str, partition_by: str = None) -> int:
+    """
+    Moves the ledger to another storage format and makes it the active one. A partitioned
+    ledger can also be split again by another scheme. Expenses are written in ID order. Rows that can't be encoded (invalid ID, date or amount)
+    are skipped when moving to any format other than CSV.
+
+    Args:
+        target_format (str): One of STORAGE_FORMATS.
+        partition_by (str, optional): "year" or "month", for the partitioned format. Defaults to "year".
+
+    Returns:
+        int: The number of expenses that were moved.
+    """
+    with ledger_lock():
+        return _migrate_storage(target_format, partition_by)
+
+
+def _migrate_storage(target_format: str, partition_by: str = None) -> int:
+    if is_storage_format(target_format, partition_by):
+        return 0
+    source = get_storage()
+    # The highest ID ever used, which can belong to a deleted expense
+    last_id = source.next_id() - 1
+
+    expenses = []
+    for expense in source.iter_expenses():
+        valid = (expense["ID"] or "").isdigit() and is_valid_row(expense)
+        if not valid and target_format != "csv":
+            console.print(f"[error]Skipping row due to invalid data:[/error] [white]{expense}[/white]")
+            continue
+        expenses.append(expense)
+    expenses.sort(key=lambda expense: int(expense["ID"]) if (expense["ID"] or "").isdigit() else 0)
+
+    target = create_storage(target_format, partition_by)
+    target.remove()
+    target.initialize()
+    target._append(expenses)
+
+    set_storage_format(target_format, partition_by)
+    # The cached backend of the format may be the one just moved from (e.g., yearly partitions)
+    _storage_cache.pop(target_format, None)
+    source.remove()
+
+    rebuild_ledger_meta()
+    get_storage().reserve_ids(last_id)
+    return len(expenses)
 
 
 def get_next_expense_id() -> int:
@@ -101,53 +1032,218 @@ def get_next_expense_id() -> int:
     Retrieves the next available ID for a new expense entry.
 
     Returns:
-        int: The next available ID, incremented from the highest ID found in the file. 
-             If the file is empty or doesn't exist, returns 1.
+        int: The next available ID, incremented from the highest ID ever used in the ledger.
+             If the ledger is empty or doesn't exist, returns 1.
     """
     try:
-        expenses = read_expenses()
-        ids = [int(row["ID"]) for row in expenses if row["ID"].isdigit()]
-        return max(ids, default=0) + 1
+        return get_storage().next_id()
     except Exception as e:
         console.print(f"[error]Error retrieving next expense ID:[/error] [white]{e}[/white]")
         return 1
 
 
-def filter_expenses(reader, target_year, target_month=None, target_category=None):
+def to_cents(amount) -> int:
+    """
+    Converts an amount (string or number) to an integer number of cents.
+    """
+    return int(round(float(amount) * 100))
+
+
+def _apply_to_meta(meta, expense, sign=1):
     """
-    Filters expenses by year, month, and category for summary.
+    Adds (sign=1) or removes (sign=-1) a single expense from the ledger metadata.
+    Rows with invalid data are ignored, the same way the query engine skips them.
+    """
+    if sign > 0 and (expense["ID"] or "").isdigit():
+        meta["last_id"] = max(meta["last_id"], int(expense["ID"]))
+    try:
+        if not is_valid_row(expense):
+            return
+        cents = to_cents(expense["Amount"])
+        category = expense["Category"].capitalize()
+    except (ValueError, OverflowError, TypeError, AttributeError):
+        return
+
+    month_rollup = meta["rollup"].setdefault(expense["Date"][:7], {})
+    total, count = month_rollup.get(category, (0, 0))
+    total, count = total + sign * cents, count + sign
+
+    if count > 0:
+        month_rollup[category] = [total, count]
+    else:
+        month_rollup.pop(category, None)
+        if not month_rollup:
+            del meta["rollup"][expense["Date"][:7]]
+
+
+def record_expense_change(meta, old_expense=None, new_expense=None):
+    """
+    Updates the rollup for an edited or deleted expense: the old version is removed
+    and the new one (if any) is added.
 
     Args:
-        reader: CSV reader object with expense data.
-        target_year (int): Year to filter by.
+        meta (dict): Ledger metadata read before the change was written.
+        old_expense (dict, optional): The expense as it was before the change.
+        new_expense (dict, optional): The expense after the change. None for deletions.
+    """
+    if old_expense:
+        _apply_to_meta(meta, old_expense, sign=-1)
+    if new_expense:
+        _apply_to_meta(meta, new_expense)
+
+
+def rebuild_ledger_meta():
+    """
+    Rebuilds the ledger metadata from the storage backend and saves it.
+
+    Returns:
+        dict: The rebuilt metadata with the highest ID and the rollup totals.
+    """
+    with ledger_lock():
+        return _rebuild_ledger_meta()
+
+
+def _rebuild_ledger_meta():
+    meta = {"last_id": 0, "rollup": {}}
+
+    # Never lower the ID high-water mark, so IDs of deleted expenses aren't reused
+    try:
+        meta["last_id"] = json.loads(META_FILE_PATH.read_text(encoding="utf-8")).get("last_id", 0)
+    except (FileNotFoundError, ValueError):
+        pass
+
+    last_id, meta["rollup"] = get_storage().rollup()
+    meta["last_id"] = max(meta["last_id"], last_id)
+    save_ledger_meta(meta)
+    return meta
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _copy_meta(meta):
+    return {**meta, "rollup": {
+        month_key: {category: list(totals) for category, totals in categories.items()}
+        for month_key, categories in meta["rollup"].items()
+    }}
+
+
+def _load_ledger_meta():
+    try:
+        meta = json.loads(META_FILE_PATH.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    return meta if isinstance(meta, dict) and "rollup" in meta else None
+
+
+# The metadata last read or saved by this process, with the stamp of the file it matches
+_meta_cache = None
+
+
+def read_ledger_meta():
+    """
+    Reads the ledger metadata. It's kept in memory while the metadata file is unchanged.
+    If the ledger changed since the metadata was saved, it's brought up to date by scanning
+    only the appended rows when the ledger just grew, or rebuilt from the whole ledger.
+
+    Returns:
+        dict: A dictionary with "last_id" and "rollup", where the rollup maps "YYYY-MM" to
+              {category: [total in cents, number of expenses]}.
+    """
+    global _meta_cache
+    fingerprint = get_storage().fingerprint()
+    stamp = file_identity(META_FILE_PATH)
+    if _meta_cache is not None and _meta_cache[0] == stamp and _meta_cache[1].get("fingerprint") == fingerprint:
+        return _copy_meta(_meta_cache[1])
+
+    meta = _load_ledger_meta()
+    if meta is not None and meta.get("fingerprint") == fingerprint:
+        _meta_cache = (stamp, meta)
+        return _copy_meta(meta)
+
+    with ledger_lock():
+        # Another process may have brought it up to date while this one waited for the lock
+        meta = _load_ledger_meta()
+        if meta is not None and meta.get("fingerprint") == get_storage().fingerprint():
+            return _copy_meta(meta)
+        if meta is not None and get_storage().catch_up(meta):
+            save_ledger_meta(meta)
+            return _copy_meta(meta)
+        return _rebuild_ledger_meta()
+
+
+def save_ledger_meta(meta):
+    """
+    Saves the ledger metadata along with the current fingerprint of the storage, and the
+    snapshot of its files used to catch up with appended rows.
+    Nothing is saved if the ledger doesn't exist yet.
+    """
+    global _meta_cache
+    meta["fingerprint"] = get_storage().fingerprint()
+    if meta["fingerprint"] is None:
+        return
+    meta["snapshot"] = get_storage().snapshot()
+    # The metadata can be rebuilt, so it isn't flushed to disk on its own
+    with atomic_write(META_FILE_PATH, sync=False, encoding="utf-8") as file:
+        file.write(json.dumps(meta))
+    _meta_cache = (file_identity(META_FILE_PATH), _copy_meta(meta))
+
+
+def get_monthly_totals() -> Dict[str, float]:
+    """
+    Returns the total expenses of every month, without scanning the ledger.
+
+    Returns:
+        dict: A dictionary mapping "YYYY-MM" strings to the total expenses of that month.
+    """
+    return get_storage().monthly_totals()
+
+
+def get_monthly_total(year: int, month: int) -> float:
+    """
+    Returns the total expenses for a specific month, without scanning the ledger.
+    """
+    return get_monthly_totals().get(f"{year}-{month:02d}", 0.0)
+
+
+def summarize_expenses(target_year=None, target_month=None, target_category=None):
+    """
+    Summarizes expenses by year, month, and category. Aggregation is done by the storage
+    backend (from the rollup, or with a query).
+
+    Args:
+        target_year (int, optional): Year to filter by. Defaults to all years.
         target_month (int, optional): Month (1-12). Defaults to all months.
         target_category (str, optional): Category. Defaults to all categories.
 
     Returns:
         tuple: (total_expense, filtered_expense, category_summary)
     """
-    total_expense = 0.00
-    filtered_expense = 0.00
-    category_summary = defaultdict(float)
+    return get_storage().summarize(target_year, target_month, target_category)
 
-    for row in reader:
-        try:
-            date = datetime.strptime(row["Date"], "%Y-%m-%d")
-            amount = float(row["Amount"])
-            category = row["Category"].capitalize()
 
-            total_expense += amount
+def _summarize_rollup(rollup, target_year=None, target_month=None, target_category=None):
+    """
+    Summarizes a rollup by year, month, and category, like summarize_expenses.
+    """
+    total_cents = 0
+    filtered_cents = 0
+    category_cents = defaultdict(int)
 
-            matches_year = (target_year is None or date.year == target_year)
-            matches_month = (target_month is None or date.month == target_month)
+    for month_key in sorted(rollup):
+        year, month = map(int, month_key.split("-"))
+        matches_year = (target_year is None or year == target_year)
+        matches_month = (target_month is None or month == target_month)
+
+        for category, (cents, _) in rollup[month_key].items():
+            total_cents += cents
 
             matches_category = (target_category is None or category == target_category)
 
             if matches_year and matches_month and matches_category:
-                filtered_expense += amount
-                category_summary[category] += amount
-
-        except ValueError as e:
-            console.print(f"[error]Skipping row due to error:[/error] [white]{e}[/white]")
+                filtered_cents += cents
+                category_cents[category] += cents
 
-    return total_expense, filtered_expense, category_summary
+    category_summary = defaultdict(float, {category: cents / 100 for category, cents in category_cents.items()})
+    return total_cents / 100, filtered_cents / 100, category_summary
@@ -1,14 +1,32 @@
 import re
 import csv
+import gzip
 import json
-from openpyxl import Workbook
-from datetime import datetime
-from styles.colors import console
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from pathlib import Path
+from utils.data_manager import DATA_DIR, FIELD_NAMES, ledger_lock
+from utils.locking import atomic_write
+from utils.query_engine import ExpenseQuery
+from utils.records import parse_date
 
 
-def validate_expenses_data(data):
-    if not isinstance(data, list) or not all(isinstance(item, dict) for item in data):
-        raise ValueError("Invalid data format. Expected a list of dictionaries.")
+WATERMARK_FILE_PATH = DATA_DIR / "export_watermarks.json"
+
+STREAMING_FORMATS = [".csv", ".json", ".ndjson"]
+EXPORT_FORMATS = STREAMING_FORMATS + [".xlsx"]
+
+# Rows per sheet allowed by Excel, including the header
+EXCEL_MAX_ROWS = 1048576
+
+# Multi-file exports hand rows to each writer in batches, with at most this many batches waiting per writer
+EXPORT_BATCH_SIZE = 500
+EXPORT_QUEUE_BATCHES = 256
+
+# Split exports keep at most this many files open, closing the least recently written one
+EXPORT_MAX_OPEN_FILES = 32
 
 
 def format_budget_summary(budget_info):
@@ -19,40 +37,105 @@ def format_budget_summary(budget_info):
     }
 
 
-def write_csv(output_path, data, budget_info=None):
+def open_output(output_path, append=False):
+    """
+    Opens an export file for writing text, compressed with gzip if its name ends with '.gz'.
+    In append mode, a compressed file gets a new gzip member, which readers join transparently.
     """
-    Exports expense data and optional budget summary to a CSV file.
+    mode = "a" if append else "w"
+    if str(output_path).lower().endswith(".gz"):
+        return gzip.open(output_path, f"{mode}t", newline="", encoding="utf-8")
+    return open(output_path, mode, newline="", encoding="utf-8")
 
-    Args:
-        output_path (str): Path to save the CSV file.
-        data (list of dict): List of expenses, each represented as a dictionary.
-        budget_info (dict, optional): Budget summary including budget amount, current expenses,
-                                      and remaining budget. Defaults to None.
+
+class ExportWriter:
     """
-    validate_expenses_data(data)
+    Incremental writer of a text export file (CSV, JSON or NDJSON). The file is opened on the
+    first write, and can be closed between writes with suspend() and reopened in append
+    mode, so split exports can write many files in one pass with a few of them open.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.count = 0
+        self._file = None
+        self._started = False
+
+    def _open(self):
+        if self._file is None:
+            self._file = open_output(self.output_path, append=self._started)
+            self.opened(self._file)
+            if not self._started:
+                self._started = True
+                self.start()
+        return self._file
+
+    def write(self, row):
+        self._open()
+        self.write_row(row)
+        self.count += 1
+
+    def suspend(self):
+        """Closes the file until the next write."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self, budget_info=None):
+        """
+        Writes the end of the file, with the optional budget summary, and closes it.
+
+        Returns:
+            int: The number of expenses written.
+        """
+        self._open()
+        self.end(budget_info)
+        self.suspend()
+        return self.count
+
+    # Format hooks
+
+    def opened(self, file):
+        self.file = file
+
+    def start(self):
+        pass
+
+    def write_row(self, row):
+        raise NotImplementedError
+
+    def end(self, budget_info):
+        pass
+
+
+class CsvExportWriter(ExportWriter):
+    def opened(self, file):
+        self.writer = csv.DictWriter(file, fieldnames=FIELD_NAMES)
+
+    def start(self):
+        self.writer.writeheader()
 
-    with open(output_path, "w", newline="", encoding="utf-8") as file:
-        writer = csv.DictWriter(file, fieldnames=["ID", "Date", "Amount", "Category", "Description"])
-        writer.writeheader()
-        writer.writerows(data)
+    def write_row(self, row):
+        self.writer.writerow(row)
 
+    def end(self, budget_info):
         if budget_info:
             summary = format_budget_summary(budget_info)
-            writer.writerow({})
-            writer.writerow({"ID": "Budget Information"})
-            writer.writerow({
+            self.writer.writerow({})
+            self.writer.writerow({"ID": "Budget Information"})
+            self.writer.writerow({
                 "Date": "Budget Amount",
                 "Description": "",
                 "Category": "",
                 "Amount": summary["Budget Amount"]
             })
-            writer.writerow({
+            self.writer.writerow({
                 "Date": "Current Expenses",
                 "Description": "",
                 "Category": "",
                 "Amount": summary["Current Expenses"]
             })
-            writer.writerow({
+            self.writer.writerow({
                 "Date": "Remaining Budget",
                 "Description": "",
                 "Category": "",
@@ -60,121 +143,369 @@ def write_csv(output_path, data, budget_info=None):
             })
 
 
-def write_json(output_path, data, budget_info=None):
+class JsonExportWriter(ExportWriter):
+    """
+    Encodes the "expenses" array one expense at a time, with the same layout as
+    json.dump(..., indent=4).
     """
-    Exports expense data and optional budget summary to a JSON file.
 
-    Args:
-        output_path (str): Path to save the JSON file.
-        data (list of dict): List of expenses, each represented as a dictionary.
-        budget_info (dict, optional): Budget summary including budget amount, current expenses,
-                                      and remaining budget. Defaults to None.
+    def start(self):
+        self.file.write('{\n    "expenses": [')
+
+    def write_row(self, row):
+        self.file.write(",\n" if self.count else "\n")
+        self.file.write(_indent(json.dumps(row, indent=4, ensure_ascii=False), 2))
+
+    def end(self, budget_info):
+        self.file.write("\n    ]" if self.count else "]")
+        if budget_info:
+            summary = json.dumps(format_budget_summary(budget_info), indent=4, ensure_ascii=False)
+            self.file.write(f',\n    "Budget Information": {_indent(summary, 1).lstrip()}')
+        self.file.write("\n}")
+
+
+class NdjsonExportWriter(ExportWriter):
+    """
+    Writes one expense object per line. The budget summary is a last line with a "Budget Information" key.
     """
-    validate_expenses_data(data)
 
-    output = {"expenses": data}
-    if budget_info:
-        output["Budget Information"] = format_budget_summary(budget_info)
+    def write_row(self, row):
+        self.file.write(json.dumps(row, ensure_ascii=False))
+        self.file.write("\n")
 
-    with open(output_path, "w", encoding="utf-8") as file:
-        json.dump(output, file, indent=4, ensure_ascii=False)
+    def end(self, budget_info):
+        if budget_info:
+            self.file.write(json.dumps({"Budget Information": format_budget_summary(budget_info)}, ensure_ascii=False))
+            self.file.write("\n")
 
 
-def write_excel(output_path, data, budget_info=None):
+EXPORT_WRITERS = {".csv": CsvExportWriter, ".json": JsonExportWriter, ".ndjson": NdjsonExportWriter}
+
+
+def _write_stream(writer_class, output_path, data, budget_info):
+    writer = writer_class(output_path)
+    for row in data:
+        writer.write(row)
+    return writer.finish(budget_info)
+
+
+def _indent(text, levels):
+    return "\n".join(" " * 4 * levels + line for line in text.splitlines())
+
+
+def write_excel(output_path, data, budget_info=None, sheet_by=None):
     """
     Exports expense data and optional budget summary to an Excel file.
+    Uses a write-only workbook, so rows go straight to disk instead of being kept in memory.
+    IDs and amounts are written as numbers and dates as date cells, so they can be sorted
+    and summed in Excel.
 
     Args:
         output_path (str): Path to save the Excel file.
-        data (list of dict): List of expenses, each represented as a dictionary.
+        data (iterable of dict): Expenses, each represented as a dictionary.
         budget_info (dict, optional): Budget summary including budget amount, current expenses,
                                       and remaining budget. Defaults to None.
+        sheet_by (str, optional): "month" or "category" to put each month or category in its
+                                  own sheet, in a single pass over the data. Defaults to None.
+
+    Returns:
+        int: The number of expenses written.
     """
-    validate_expenses_data(data)
+    # openpyxl is slow to import, so only Excel exports load it
+    from openpyxl import Workbook
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Expenses"
+    workbook = Workbook(write_only=True)
+    sheets, parts, rows_written = {}, {}, {}
+    count = 0
 
-    headers = ["ID", "Date", "Amount", "Category", "Description"]
-    ws.append(headers)
     for row in data:
-        ws.append([row["ID"], row["Date"], row["Amount"], row["Category"], row["Description"]])
+        if sheet_by == "month":
+            key = row["Date"][:7]
+        elif sheet_by == "category":
+            key = row["Category"]
+        else:
+            key = "Expenses"
+
+        # A full sheet continues in a new one (e.g., 'Expenses (2)')
+        if key not in sheets or rows_written[key] >= EXCEL_MAX_ROWS:
+            parts[key] = parts.get(key, 0) + 1
+            sheets[key] = _create_expense_sheet(workbook, key, parts[key])
+            rows_written[key] = 1
+        sheets[key].append(_excel_row(row))
+        rows_written[key] += 1
+        count += 1
+
+    if not sheets:
+        sheets["Expenses"] = _create_expense_sheet(workbook, "Expenses")
 
     if budget_info:
         summary = format_budget_summary(budget_info)
-        ws.append([])
+        if sheet_by:
+            ws = workbook.create_sheet("Budget Information")
+        else:
+            ws = sheets["Expenses"]
+            ws.append([])
         ws.append(["Budget Information"])
         for key, value in summary.items():
             ws.append([key, value])
 
-    wb.save(output_path)
+    workbook.save(output_path)
+    return count
+
+
+def _create_expense_sheet(workbook, key, part=1):
+    """
+    Adds a sheet with the expense headers. Sheet names are limited to 31 characters without []:*?/\\.
+    """
+    title = re.sub(r"[\[\]:*?/\\]", "_", str(key))[:26] or "Expenses"
+    ws = workbook.create_sheet(f"{title} ({part})" if part > 1 else title)
+
+    # Column widths must be set before the first row of a write-only sheet
+    for column, width in zip("ABCDE", [10, 12, 12, 15, 40]):
+        ws.column_dimensions[column].width = width
+    ws.append(FIELD_NAMES)
+    return ws
 
 
-def generate_unique_filename(output_path):
+def _excel_row(row):
+    """
+    Converts an expense to Excel cell values: numbers and a date, or the raw strings if they can't be parsed.
+    """
+    try:
+        expense_id = int(row["ID"])
+    except (TypeError, ValueError):
+        expense_id = row["ID"]
+    try:
+        expense_date = parse_date(row["Date"])
+    except (TypeError, ValueError):
+        expense_date = row["Date"]
+    try:
+        amount = float(row["Amount"])
+    except (TypeError, ValueError):
+        amount = row["Amount"]
+    return [expense_id, expense_date, amount, row["Category"], row["Description"]]
+
+
+def generate_unique_filename(output_path, taken=()):
     """
     Generates a unique filename by appending a number suffix (e.g., 'file(1).json').
 
     Args:
         output_path (Path): Path object representing the desired file path.
+        taken (collection of Path, optional): Paths already chosen for other files that
+                                              don't exist yet. Defaults to none.
 
     Returns:
         Path: A unique file path with a numeric suffix if needed.
     """
     counter = 1
-    original_stem = re.sub(r"\(\d+\)$", "", output_path.stem)
+    stem, suffix = _split_name(output_path)
+    original_stem = re.sub(r"\(\d+\)$", "", stem)
 
-    while output_path.exists():
-        output_path = output_path.parent / f"{original_stem}({counter}){output_path.suffix}"
+    while output_path.exists() or output_path in taken:
+        output_path = output_path.parent / f"{original_stem}({counter}){suffix}"
         counter += 1
 
     return output_path
 
 
-def filter_expenses(expenses, year=None, month=None, category=None):
+def _split_name(output_path):
+    """
+    Splits a file name into its stem and suffix, keeping both suffixes of compressed
+    files together (e.g., 'file' and '.json.gz').
+    """
+    suffix = "".join(output_path.suffixes[-2:]) if output_path.suffix.lower() == ".gz" else output_path.suffix
+    return output_path.name[:len(output_path.name) - len(suffix)], suffix
+
+
+def get_output_format(output_path):
+    """
+    Returns the export format of a file name (e.g., '.json' for both 'file.json' and 'file.json.gz'),
+    or None if it isn't supported. Only the text formats can be compressed.
+    """
+    output_format = output_path.suffix.lower()
+    if output_format == ".gz":
+        output_format = Path(output_path.stem).suffix.lower()
+        return output_format if output_format in STREAMING_FORMATS else None
+    return output_format if output_format in EXPORT_FORMATS else None
+
+
+def read_watermark(name: str):
+    """
+    Returns the change log position where the previous incremental export with this name
+    stopped, or None if it never ran.
+    """
+    try:
+        return json.loads(WATERMARK_FILE_PATH.read_text(encoding="utf-8")).get(name)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_watermark(name: str, position: int):
+    with ledger_lock():
+        try:
+            watermarks = json.loads(WATERMARK_FILE_PATH.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            watermarks = {}
+        watermarks[name] = position
+        with atomic_write(WATERMARK_FILE_PATH, encoding="utf-8") as file:
+            file.write(json.dumps(watermarks, indent=4, ensure_ascii=False))
+
+
+def changed_expenses(changes, added, query: ExpenseQuery):
     """
-    Filters expenses based on year, month, and/or category for export.
+    Yields the expenses of an incremental export: the added and updated expenses that
+    match the query, and a tombstone ({"ID": ..., "Deleted": True}) for each expense that
+    was updated or deleted and doesn't match it anymore (e.g., its category changed), so
+    the target drops its copy. Expenses added since the previous export that don't match
+    (or were deleted again) are skipped, since the target never received them. With
+    filters, the previous state of an updated expense isn't known, so a tombstone can
+    still name an expense the target doesn't have.
 
     Args:
-        expenses (list of dict): List of expenses to filter.
-        year (int, optional): Target year for filtering. Defaults to None.
-        month (int, optional): Target month for filtering. Defaults to None.
-        category (str, optional): Target category for filtering. Defaults to None.
+        changes (dict): Latest change by expense ID, as returned by read_changes().
+        added (set): IDs of the expenses added since the previous export, as returned by read_changes().
+        query (ExpenseQuery): The filters of the export.
+    """
+    for expense_id, expense in changes.items():
+        if expense is not None and query.matches(expense):
+            yield expense
+        elif expense_id not in added:
+            yield {"ID": expense_id, "Deleted": True}
+
+
+def split_key(row, split_by: str) -> str:
+    """
+    Returns the group of an expense for a split export: 'YYYY', 'YYYY-MM' or the category.
+    """
+    if split_by == "year":
+        return row["Date"][:4]
+    if split_by == "month":
+        return row["Date"][:7]
+    return row["Category"].strip().capitalize()
+
+
+def split_filename(output_path, group: str):
+    """
+    Returns the file name for one group of a split export (e.g., 'report_2025-01.csv.gz').
+    """
+    stem, suffix = _split_name(output_path)
+    group = re.sub(r"[^\w-]", "_", group)
+    return output_path.parent / f"{stem}_{group}{suffix}"
+
+
+def write_split_export(output_path, output_format, data, split_by, budget_for=None, max_open=EXPORT_MAX_OPEN_FILES):
+    """
+    Writes one file per year, month or category in a single pass over the expenses.
+    At most max_open files are open at a time: the least recently written one is closed
+    when another is needed, and reopened in append mode if more of its expenses come.
+
+    Args:
+        output_path (Path): Path of the export; the group is added to the name of each file.
+        output_format (str): '.csv', '.json' or '.ndjson'.
+        data (iterable of dict): Expenses, each represented as a dictionary.
+        split_by (str): "year", "month" or "category".
+        budget_for (callable, optional): Returns the budget summary of a group, or None.
+        max_open (int, optional): Maximum number of files open at once.
 
     Returns:
-        list of dict: Filtered list of expenses.
+        dict: The number of expenses written to each file, by path.
     """
-    filtered = []
+    writers = {}
+    open_writers = OrderedDict()
 
-    current_year = datetime.now().year
+    for row in data:
+        group = split_key(row, split_by)
+        writer = writers.get(group)
+        if writer is None:
+            path = generate_unique_filename(split_filename(output_path, group), taken={w.output_path for w in writers.values()})
+            writer = writers[group] = EXPORT_WRITERS[output_format](path)
+
+        if group in open_writers:
+            open_writers.move_to_end(group)
+        else:
+            if len(open_writers) >= max_open:
+                open_writers.popitem(last=False)[1].suspend()
+            open_writers[group] = writer
+        writer.write(row)
+
+    counts = {}
+    for group, writer in writers.items():
+        counts[writer.output_path] = writer.finish(budget_for(group) if budget_for else None)
+    return counts
+
+
+def write_export(output_path, output_format, data, budget_info=None, sheet_by=None, split_by=None, budget_for=None):
+    """
+    Writes expenses to a file with the writer of its format (see get_output_format),
+    or to one file per group if split_by is given.
+
+    Returns:
+        dict: The number of expenses written to each file, by path.
+    """
+    if split_by:
+        return write_split_export(output_path, output_format, data, split_by, budget_for=budget_for)
+    if output_format == ".xlsx":
+        return {output_path: write_excel(output_path, data, budget_info=budget_info, sheet_by=sheet_by)}
+    return {output_path: _write_stream(EXPORT_WRITERS[output_format], output_path, data, budget_info)}
 
-    if month and not year:
-        try:
-            recent_year = max(
-                datetime.strptime(row["Date"], "%Y-%m-%d").year
-                for row in expenses
-                if "Date" in row
-            )
-            year = min(recent_year, current_year)
-        except ValueError:
-            year = current_year
-            console.print(f"[error]Error:[/error] [white]Could not determine a valid year for the selected month. Defaulting to current year:[/white] [warning]{current_year}[/warning]")
-
-    # Filtering data
-    for row in expenses:
-        try:
-            date = datetime.strptime(row["Date"], "%Y-%m-%d").date()
-        except ValueError:
-            console.print(f"[error]Error:[/error] [white]Invalid date format found in expense record. Skipping entry:[/white] [warning]{row}[/warning]")
-            continue
 
-        matches_date = (
-            (not month or (date.month == month and date.year == year)) and
-            (not year or date.year == year)
-        )
-        matches_category = not category or row["Category"].strip().lower() == category.strip().lower()
+def write_exports(targets, data, budget_info=None, sheet_by=None, split_by=None, budget_for=None):
+    """
+    Writes one pass over the expenses to several files at once.
 
-        if matches_date and matches_category:
-            filtered.append(row)
+    Each file is written by its own thread, fed through a bounded queue of row batches,
+    so a slow writer (Excel) doesn't stop the others until it falls far behind, and the
+    memory used stays bounded.
 
-    return filtered
+    Args:
+        targets (list of tuple): (output path, output format) for each file.
+        data (iterable of dict): Expenses, each represented as a dictionary.
+        budget_info (dict, optional): Budget summary written to every file. Defaults to None.
+        sheet_by (str, optional): Sheet split for the Excel files. Defaults to None.
+        split_by (str, optional): Writes one file per group of each target (see write_split_export).
+        budget_for (callable, optional): Budget summary of each group of a split export.
+
+    Returns:
+        dict: The number of expenses written to each file, by path.
+    """
+    options = {"budget_info": budget_info, "sheet_by": sheet_by, "split_by": split_by, "budget_for": budget_for}
+    if len(targets) == 1:
+        output_path, output_format = targets[0]
+        return write_export(output_path, output_format, data, **options)
+
+    queues = [queue.Queue(maxsize=EXPORT_QUEUE_BATCHES) for _ in targets]
+
+    def read_queue(batches):
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+            yield from batch
+
+    def put(batches, future, batch):
+        # A writer that failed stops reading, so don't wait for room in its queue
+        while not future.done():
+            try:
+                batches.put(batch, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = [
+            pool.submit(write_export, output_path, output_format, read_queue(batches), **options)
+            for (output_path, output_format), batches in zip(targets, queues)
+        ]
+        try:
+            for batch in iter(lambda: list(islice(data, EXPORT_BATCH_SIZE)), []):
+                for batches, future in zip(queues, futures):
+                    put(batches, future, batch)
+        finally:
+            for batches, future in zip(queues, futures):
+                put(batches, future, None)
+
+        counts = {}
+        for future in futures:
+            counts.update(future.result())
+        return counts
@@ -0,0 +1,154 @@
+import mmap
+from datetime import date
+from utils.data_manager import FIELD_NAMES, _apply_to_meta
+from utils.ledger_index import decode_row
+
+
+def _month_key(raw_date: bytes):
+    """
+    Returns the "YYYY-MM" key of a raw date, or None if it isn't a valid 'YYYY-MM-DD' date.
+    """
+    if len(raw_date) != 10 or raw_date[4:5] != b"-" or raw_date[7:8] != b"-":
+        return None
+    try:
+        expense_date = raw_date.decode("utf-8")
+        date.fromisoformat(expense_date)
+    except ValueError:
+        return None
+    return expense_date[:7]
+
+
+def _as_row(fields):
+    """
+    Maps CSV fields to an expense dictionary the way csv.DictReader does: missing
+    fields are None and extra ones are kept under the None key.
+    """
+    row = dict(zip(FIELD_NAMES, fields))
+    for name in FIELD_NAMES[len(fields):]:
+        row[name] = None
+    if len(fields) > len(FIELD_NAMES):
+        row[None] = fields[len(FIELD_NAMES):]
+    return row
+
+
+def rollup_bytes(data, start: int, end: int, changes=None):
+    """
+    Aggregates the CSV records in data[start:end] by month and category, with the same
+    result as building a dictionary per row and adding it to the rollup. Records must
+    follow FIELD_NAMES and start at a record boundary.
+
+    Only the ID, date, amount and category of a plain record (no quotes) are looked at:
+    they are split from the raw bytes, the date and category are decoded once per distinct
+    value, and the amount goes straight to integer cents. Quoted records (a description
+    with commas, quotes or line breaks) and rows changed in the journal go through the
+    full CSV parser.
+
+    Args:
+        data (bytes or mmap.mmap): The contents of the CSV file.
+        start (int): Offset of the first record.
+        end (int): Offset where the scan stops.
+        changes (dict, optional): The journal: ID -> new row, or None for deleted rows.
+
+    Returns:
+        dict: Ledger metadata with "last_id" and "rollup".
+    """
+    changes = changes or {}
+    changed = {expense_id.encode("utf-8"): row for expense_id, row in changes.items()}
+    months, categories = {}, {}
+    last_id = 0
+    meta = {"last_id": 0, "rollup": {}}
+    rollup = meta["rollup"]
+
+    position = start
+    while position < end:
+        line_end = data.find(b"\n", position, end)
+        if line_end == -1:
+            line_end = end
+        next_position = line_end + 1
+        # A trailing "\r" stays in the description, which isn't looked at
+        line = data[position:line_end]
+
+        fields = line.split(b",") if b'"' not in line else None
+        if fields is None or len(fields) != 5 or fields[0] in changed:
+            # Full parse, keeping quoted line breaks inside the record
+            raw = data[position:next_position]
+            while raw.count(b'"') % 2 and next_position < end:
+                line_end = data.find(b"\n", next_position, end)
+                line_end = end if line_end == -1 else line_end
+                raw += data[next_position:line_end + 1]
+                next_position = line_end + 1
+            position = next_position
+
+            fields = decode_row(raw)
+            if not fields:
+                continue
+            row = _as_row(fields)
+            if row["ID"] in changes:
+                row = changes[row["ID"]]
+                if row is None:
+                    continue
+            meta["last_id"] = last_id
+            _apply_to_meta(meta, row)
+            last_id = meta["last_id"]
+            continue
+        position = next_position
+
+        raw_id, raw_date, raw_amount, raw_category, _ = fields
+        if raw_id.isdigit():
+            expense_id = int(raw_id)
+            if expense_id > last_id:
+                last_id = expense_id
+
+        if raw_date in months:
+            month_key = months[raw_date]
+        else:
+            month_key = months[raw_date] = _month_key(raw_date)
+        if month_key is None:
+            continue
+        try:
+            cents = int(round(float(raw_amount) * 100))
+        except (ValueError, OverflowError):
+            continue
+
+        if raw_category in categories:
+            category = categories[raw_category]
+        else:
+            category = categories[raw_category] = raw_category.decode("utf-8").capitalize()
+
+        month_rollup = rollup.get(month_key)
+        if month_rollup is None:
+            month_rollup = rollup[month_key] = {}
+        totals = month_rollup.get(category)
+        if totals is None:
+            month_rollup[category] = [cents, 1]
+        else:
+            totals[0] += cents
+            totals[1] += 1
+
+    meta["last_id"] = last_id
+    return meta
+
+
+def scan_rollup(path, changes=None, start: int = None, end: int = None):
+    """
+    Memory-maps a CSV ledger and aggregates it (or a byte range of it) by month and category.
+
+    Args:
+        path (Path): The CSV file.
+        changes (dict, optional): The journal: ID -> new row, or None for deleted rows.
+        start (int, optional): Offset of the first record. Defaults to the one after the header.
+        end (int, optional): Offset where the scan stops. Defaults to the end of the file.
+
+    Returns:
+        dict: Ledger metadata with "last_id" and "rollup".
+    """
+    with path.open("rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # An empty file can't be mapped
+            return {"last_id": 0, "rollup": {}}
+        with data:
+            if start is None:
+                start = data.find(b"\n") + 1 or len(data)
+            return rollup_bytes(data, start, len(data) if end is None else end, changes)
@@ -0,0 +1,218 @@
+import csv
+import json
+import click
+from itertools import islice
+from utils.records import format_cents
+from utils.validators import validate_parse_date, validate_amount, validate_category, validate_description
+
+
+IMPORT_FORMATS = ["csv", "json", "ndjson"]
+IMPORT_BATCH_SIZE = 5000
+REJECT_FIELD_NAMES = ["Line", "Reason", "Date", "Amount", "Category", "Description"]
+
+# Size of the chunks read by the streaming JSON reader
+JSON_CHUNK_SIZE = 1 << 16
+
+
+def read_csv_rows(file):
+    """
+    Yields (line number, row) for each row of a CSV file with a header.
+    """
+    reader = csv.DictReader(file)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson_rows(file):
+    """
+    Yields (line number, row) for each non-empty line of a newline-delimited JSON file.
+    Lines that aren't JSON objects are yielded as None so they can be rejected.
+    """
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def read_json_rows(file):
+    """
+    Yields (item number, row) for each item of the first JSON array in a file, decoding
+    one item at a time. Works both with a plain array and with the files written by the
+    export command ({"expenses": [...]}). Items that aren't objects are yielded as None.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill():
+        nonlocal buffer, eof
+        chunk = file.read(JSON_CHUNK_SIZE)
+        if chunk:
+            buffer += chunk
+        else:
+            eof = True
+
+    # Skip everything up to the opening bracket of the array
+    while "[" not in buffer and not eof:
+        fill()
+    if "[" not in buffer:
+        raise ValueError("No JSON array of expenses was found.")
+    buffer = buffer[buffer.index("[") + 1:]
+
+    item_number = 0
+    position = 0
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError:
+            # The item may continue in the next chunk
+            if eof:
+                raise ValueError(f"Invalid JSON after item {item_number}.")
+            buffer = buffer[position:]
+            position = 0
+            fill()
+            continue
+
+        item_number += 1
+        position = end
+        yield item_number, item if isinstance(item, dict) else None
+
+
+IMPORT_READERS = {"csv": read_csv_rows, "json": read_json_rows, "ndjson": read_ndjson_rows}
+
+
+class ImportValidator:
+    """
+    Validates imported rows with the same rules as the add command. Dates and categories
+    repeat a lot in bulk data, so the result of validating each distinct value is cached.
+    """
+
+    def __init__(self):
+        self._dates = {}
+        self._categories = {}
+
+    def _validate_date(self, value):
+        if value not in self._dates:
+            try:
+                year, month, day = validate_parse_date(value, force_full_date=True)
+                self._dates[value] = (f"{year:04d}-{month:02d}-{day:02d}", None)
+            except click.BadParameter as e:
+                self._dates[value] = (None, e.message)
+        return self._dates[value]
+
+    def _validate_category(self, value):
+        if value not in self._categories:
+            try:
+                self._categories[value] = (validate_category(value), None)
+            except click.BadParameter as e:
+                self._categories[value] = (None, e.message)
+        return self._categories[value]
+
+    def validate(self, row):
+        """
+        Validates a row with 'Date', 'Amount', 'Category' and an optional 'Description' (any letter case).
+
+        Returns:
+            tuple: ((date, cents, category, description), None) for a valid row,
+                   or (None, reason) for a rejected one.
+        """
+        if row is None:
+            return None, "Not an expense object."
+        fields = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+
+        date = str(fields.get("date") or "").strip()
+        if not date:
+            return None, "Missing date."
+        date, error = self._validate_date(date)
+        if error:
+            return None, error
+
+        try:
+            amount = validate_amount(float(fields.get("amount")))
+        except (TypeError, ValueError):
+            return None, "Missing or non-numeric amount."
+        except click.BadParameter as e:
+            return None, e.message
+
+        category, error = self._validate_category(str(fields.get("category") or "").strip())
+        if error:
+            return None, error
+
+        try:
+            description = validate_description(str(fields.get("description") or "").strip())
+        except click.BadParameter as e:
+            return None, e.message
+
+        return (date, round(amount * 100), category, description), None
+
+
+def validate_rows(rows, on_reject, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validates (line number, row) pairs in batches and yields the valid ones as batches of
+    (date, cents, category, description) tuples.
+
+    Args:
+        rows (iterable): (line number, row) pairs from one of the IMPORT_READERS.
+        on_reject (callable): Called with (line number, row, reason) for each rejected row.
+        batch_size (int, optional): Rows validated per batch.
+    """
+    validator = ImportValidator()
+    rows = iter(rows)
+    for batch in iter(lambda: list(islice(rows, batch_size)), []):
+        valid = []
+        for line_number, row in batch:
+            expense, reason = validator.validate(row)
+            if expense is None:
+                on_reject(line_number, row, reason)
+            else:
+                valid.append(expense)
+        yield valid
+
+
+def build_expense_rows(expenses, first_id: int):
+    """
+    Assigns a contiguous block of IDs, starting at first_id, to validated expenses.
+
+    Returns:
+        list of dict: The expenses as dictionaries of strings keyed by FIELD_NAMES.
+    """
+    return [
+        {"ID": str(expense_id), "Date": date, "Amount": format_cents(cents), "Category": category, "Description": description}
+        for expense_id, (date, cents, category, description) in enumerate(expenses, start=first_id)
+    ]
+
+
+class RejectWriter:
+    """
+    Writes rejected rows to a CSV file with their line number and the reason. The file is
+    only created when the first row is rejected.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = None
+        self._writer = None
+
+    def __call__(self, line_number, row, reason):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("w", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=REJECT_FIELD_NAMES, extrasaction="ignore")
+            self._writer.writeheader()
+        fields = {str(key).strip().capitalize(): value for key, value in (row or {}).items() if key is not None}
+        self._writer.writerow({**fields, "Line": line_number, "Reason": reason})
+        self.count += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,300 @@
+import csv
+import mmap
+from array import array
+from bisect import bisect_left
+from utils.locking import atomic_write
+from utils.records import parse_date
+
+
+# Index files are arrays of signed 64-bit integers: a header followed by the entries
+HEADER_SIZE = 3
+OFFSET_BITS = 40
+OFFSET_MASK = (1 << OFFSET_BITS) - 1
+
+# Entries added out of order are kept in an unsorted tail until it grows past this size
+TAIL_LIMIT = 4096
+
+
+def iter_raw_rows(file, offset=0):
+    """
+    Yields (offset, raw bytes) for each CSV record of a file opened in binary mode,
+    starting at the given offset. Records with quoted line breaks are kept whole.
+    """
+    file.seek(offset)
+    pending = b""
+    start = offset
+    for line in file:
+        if not pending:
+            start = offset
+        pending += line
+        offset += len(line)
+        if pending.count(b'"') % 2 == 0:
+            yield start, pending
+            pending = b""
+    if pending:
+        yield start, pending
+
+
+def read_raw_row(file, offset):
+    """
+    Reads the raw bytes of the CSV record that starts at the given offset.
+    """
+    return next(iter_raw_rows(file, offset), (offset, b""))[1]
+
+
+def decode_row(raw: bytes):
+    """
+    Decodes the raw bytes of a CSV record into its list of fields.
+    """
+    return next(csv.reader([raw.decode("utf-8")]), [])
+
+
+def file_stamp(path):
+    """
+    Returns (size, mtime in ns) of a file, or (0, 0) if it doesn't exist.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return 0, 0
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_identity(path):
+    """
+    Returns (size, mtime in ns, inode) of a file, or None if it doesn't exist. Files replaced
+    with atomic_write get a new inode, so a replacement is seen even within the same mtime tick.
+    """
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class FileIndex:
+    """
+    Base class of the persisted indexes over the CSV file. An index file is an array of
+    signed 64-bit integers: a header with the size and mtime of the CSV file it covers and
+    one index-specific value, followed by the entries. The index is stale (and rebuilt)
+    as soon as the CSV file's size or mtime don't match the header.
+    """
+
+    def __init__(self, index_path, csv_path):
+        self.index_path = index_path
+        self.csv_path = csv_path
+
+    def _read_header(self):
+        header = array("q")
+        try:
+            with self.index_path.open("rb") as file:
+                header.fromfile(file, HEADER_SIZE)
+        except (FileNotFoundError, EOFError):
+            return None
+        return header
+
+    def is_current(self) -> bool:
+        header = self._read_header()
+        return header is not None and tuple(header[:2]) == file_stamp(self.csv_path)
+
+    def ensure_current(self):
+        if not self.is_current():
+            self.rebuild()
+
+    def _iter_rows(self):
+        """
+        Yields (offset, fields) for each row of the CSV file, skipping the header.
+        """
+        try:
+            with self.csv_path.open("rb") as file:
+                rows = iter_raw_rows(file)
+                next(rows, None)
+                for offset, raw in rows:
+                    yield offset, decode_row(raw)
+        except FileNotFoundError:
+            return
+
+    def rebuild(self):
+        """
+        Rebuilds the index with a full scan of the CSV file.
+        """
+        raise NotImplementedError
+
+    def _write(self, entries, value: int, stamp=None):
+        """
+        Replaces the index file. A rebuild passes the stamp of the CSV file from before its scan,
+        so rows appended during the scan leave the index stale instead of silently missing.
+        """
+        # The index can be rebuilt, so it isn't flushed to disk on its own
+        with atomic_write(self.index_path, "wb", sync=False) as file:
+            array("q", [*(stamp or file_stamp(self.csv_path)), value]).tofile(file)
+            array("q", entries).tofile(file)
+
+    def _map(self):
+        """
+        Returns a read-only memory map of the index file, or None if it has no entries.
+        """
+        try:
+            file = self.index_path.open("rb")
+        except FileNotFoundError:
+            return None
+        with file:
+            if self.index_path.stat().st_size <= HEADER_SIZE * 8:
+                return None
+            return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class DateIndex(FileIndex):
+    """
+    Index of the CSV file sorted by date. Each entry packs a day ordinal and the byte
+    offset of a row into one integer (ordinal << 40 | offset), so a date range maps to
+    a contiguous slice found by bisection.
+
+    The header value is the number of sorted entries. Entries added out of date order go
+    to an unsorted tail that is merged in when it grows. Rewritten rows (updates and
+    deletions) live in the journal, so only appends have to be indexed.
+    """
+
+    def rebuild(self):
+        stamp = file_stamp(self.csv_path)
+        keys = array("q")
+        for offset, fields in self._iter_rows():
+            try:
+                keys.append(parse_date(fields[1]).toordinal() << OFFSET_BITS | offset)
+            except (ValueError, IndexError):
+                continue
+        keys = sorted(keys)
+        self._write(keys, len(keys), stamp)
+
+    def add(self, entries):
+        """
+        Adds (ordinal, offset) entries for rows that were just appended to the CSV file.
+        Must be called only if the index was current before the append.
+        """
+        keys = array("q", sorted(ordinal << OFFSET_BITS | offset for ordinal, offset in entries))
+        if not keys:
+            return
+
+        with self.index_path.open("r+b") as file:
+            header = array("q")
+            header.fromfile(file, HEADER_SIZE)
+            sorted_count = header[2]
+            file.seek(0, 2)
+            total = file.tell() // keys.itemsize - HEADER_SIZE
+
+            # Entries stay in the sorted part if they all come after its last one and there's no tail yet
+            in_order = total == sorted_count
+            if in_order and sorted_count:
+                file.seek((HEADER_SIZE + sorted_count - 1) * keys.itemsize)
+                last_key = array("q")
+                last_key.fromfile(file, 1)
+                in_order = last_key[0] <= keys[0]
+
+            if not in_order and total - sorted_count + len(keys) > TAIL_LIMIT:
+                file.seek(HEADER_SIZE * keys.itemsize)
+                existing = array("q")
+                existing.frombytes(file.read())
+            else:
+                existing = None
+                file.seek(0, 2)
+                keys.tofile(file)
+                if in_order:
+                    sorted_count += len(keys)
+                file.seek(0)
+                array("q", [*file_stamp(self.csv_path), sorted_count]).tofile(file)
+
+        if existing is not None:
+            keys = sorted(existing + keys)
+            self._write(keys, len(keys))
+
+    def offsets_between(self, first_ordinal: int, last_ordinal: int):
+        """
+        Returns the byte offsets of the rows dated between two day ordinals (inclusive), in file order.
+        """
+        mapped = self._map()
+        if mapped is None:
+            return []
+
+        low_key = first_ordinal << OFFSET_BITS
+        high_key = (last_ordinal + 1) << OFFSET_BITS
+        with mapped:
+            view = memoryview(mapped).cast("q")
+            try:
+                sorted_count = view[2]
+                start = bisect_left(view, low_key, HEADER_SIZE, HEADER_SIZE + sorted_count)
+                stop = bisect_left(view, high_key, start, HEADER_SIZE + sorted_count)
+                offsets = [key & OFFSET_MASK for key in view[start:stop]]
+                offsets += [key & OFFSET_MASK for key in view[HEADER_SIZE + sorted_count:] if low_key <= key < high_key]
+            finally:
+                view.release()
+        offsets.sort()
+        return offsets
+
+
+class IdIndex(FileIndex):
+    """
+    Index of the CSV file by expense ID: entry N holds the byte offset of the row with
+    ID N, or -1 if there's none, so a lookup is a single read. The header value is unused.
+    """
+
+    def rebuild(self):
+        stamp = file_stamp(self.csv_path)
+        offsets = array("q")
+        for offset, fields in self._iter_rows():
+            try:
+                expense_id = int(fields[0])
+            except (ValueError, IndexError):
+                continue
+            if expense_id < 0:
+                continue
+            if expense_id >= len(offsets):
+                offsets.extend([-1] * (expense_id + 1 - len(offsets)))
+            offsets[expense_id] = offset
+        self._write(offsets, 0, stamp)
+
+    def add(self, entries):
+        """
+        Adds (ID, offset) entries for rows that were just appended to the CSV file.
+        Must be called only if the index was current before the append.
+        """
+        with self.index_path.open("r+b") as file:
+            file.seek(0, 2)
+            size = file.tell() // 8 - HEADER_SIZE
+            for expense_id, offset in sorted(entries):
+                if expense_id < 0:
+                    continue
+                if expense_id > size:
+                    file.seek(0, 2)
+                    array("q", [-1] * (expense_id - size)).tofile(file)
+                    size = expense_id
+                file.seek((HEADER_SIZE + expense_id) * 8)
+                array("q", [offset]).tofile(file)
+                size = max(size, expense_id + 1)
+            file.seek(0)
+            array("q", [*file_stamp(self.csv_path), 0]).tofile(file)
+
+    def last_id(self) -> int:
+        """
+        Returns the highest ID with a row in the CSV file (the last entry is always set), or 0.
+        """
+        try:
+            entries = self.index_path.stat().st_size // 8 - HEADER_SIZE
+        except FileNotFoundError:
+            return 0
+        return max(entries - 1, 0)
+
+    def offset_of(self, expense_id: int):
+        """
+        Returns the byte offset of the row with the given ID, or None if there's none.
+        """
+        mapped = self._map()
+        if mapped is None:
+            return None
+        with mapped:
+            view = memoryview(mapped).cast("q")
+            try:
+                position = HEADER_SIZE + expense_id
+                offset = view[position] if 0 <= expense_id and position < len(view) else -1
+            finally:
+                view.release()
+        return offset if offset >= 0 else None
@@ -0,0 +1,182 @@
+import os
+import json
+import stat
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory locks (Windows): writers in different processes aren't coordinated
+    fcntl = None
+
+
+# File modification times come from a coarse clock, so commits also flush files modified a bit before they started
+MTIME_SLACK_NS = 1_000_000_000
+
+
+class FileLock:
+    """
+    Exclusive advisory lock (flock) on a lock file, shared by every process that locks the
+    same file. It's reentrant within a process: nested acquisitions are only counted.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.depth = 0
+        self._file = None
+
+    def acquire(self):
+        if self.depth == 0:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = self.path.open("a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        self.depth += 1
+
+    def release(self):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def _fsync_directory(directory):
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+@contextmanager
+def atomic_write(path, mode="w", sync=True, **open_args):
+    """
+    Opens a temporary file next to path for writing, and replaces path with it when the block
+    ends without errors, so readers and a crash see either the old or the new contents.
+
+    Args:
+        path (Path): The file to replace.
+        mode (str, optional): "w" (text) or "wb" (binary). Defaults to "w".
+        sync (bool, optional): Flush the new file and the directory to disk before returning.
+                               Defaults to True.
+        **open_args: Passed to open(), e.g. newline="" or encoding="utf-8".
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with temp_path.open(mode, **open_args) as file:
+            yield file
+            if sync:
+                file.flush()
+                os.fsync(file.fileno())
+        temp_path.replace(path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    if sync:
+        _fsync_directory(path.parent)
+
+
+def sync_files(directory, since_ns: int) -> int:
+    """
+    Flushes to disk (fsync) the regular files in a directory, and its subdirectories, that were modified since a time.
+
+    Returns:
+        int: The number of files flushed.
+    """
+    synced = 0
+    # Files and directories can be replaced while this runs (commits don't hold the write lock),
+    # and os.walk skips directories that disappear
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                info = os.stat(path)
+                # Only regular files: opening a socket or a FIFO fails or blocks
+                if not stat.S_ISREG(info.st_mode) or info.st_mtime_ns < since_ns:
+                    continue
+                descriptor = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(descriptor)
+            finally:
+                os.close(descriptor)
+            synced += 1
+    _fsync_directory(directory)
+    return synced
+
+
+class GroupCommit:
+    """
+    Flushes the files of a directory to disk after writes, shared between processes.
+
+    Each write is identified by a position that grows with every write (e.g., the end of an
+    append-only log after it). A commit takes the commit lock, and returns at once if another
+    process's commit already covered its position; otherwise it flushes every file changed
+    since the last commit, which covers the writes of every process that finished before it.
+    Writers that queue up on the lock during a flush are then covered by it, so N concurrent
+    writers share one fsync instead of doing N.
+
+    The state file holds the position covered by the last commit and when it started.
+    """
+
+    def __init__(self, state_path, directory, current_position):
+        self.state_path = state_path
+        self.directory = directory
+        self.current_position = current_position
+        self.commits = 0
+
+    def _read_state(self, file):
+        file.seek(0)
+        try:
+            state = json.loads(file.read() or b"{}")
+        except ValueError:
+            state = {}
+        return state.get("position", -1), state.get("started", 0)
+
+    def commit(self, position: int) -> bool:
+        """
+        Makes sure the writes up to a position are on disk.
+
+        Returns:
+            bool: True if this call flushed the files, False if another commit already covered them.
+        """
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.state_path.open("a+b") as file:
+            if fcntl is not None:
+                fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            committed, last_started = self._read_state(file)
+            # Every write that ended before this point is covered
+            started = time.time_ns()
+            current = self.current_position()
+            if current < committed:
+                # The log was reset since the last commit
+                committed = -1
+            if committed >= position:
+                return False
+
+            covered = max(position, current)
+            sync_files(self.directory, last_started - MTIME_SLACK_NS)
+
+            file.seek(0)
+            file.truncate()
+            file.write(json.dumps({"position": covered, "started": started}).encode("utf-8"))
+            file.flush()
+            self.commits += 1
+            return True
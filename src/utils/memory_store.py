@@ -0,0 +1,132 @@
+from utils.data_manager import ExpenseStorage, _apply_to_meta, _copy_meta, _summarize_rollup, record_expense_change
+
+
+class MemoryStorage(ExpenseStorage):
+    """
+    Storage that holds the whole ledger in memory on top of the configured backend, used by
+    the interactive shell. The expenses and their rollup are loaded once; reads are served
+    from memory and writes go through to the backend, so its files are always up to date.
+
+    If the backend's files change outside the shell (its fingerprint no longer matches the
+    one after the last load or write), refresh() loads the ledger again. Writes and new IDs
+    check it first: they run under the ledger's write lock, so nothing can change in between.
+    """
+
+    def __init__(self, backend: ExpenseStorage):
+        self.backend = backend
+        self.name = backend.name
+        self.maintains_rollup = backend.maintains_rollup
+        self._expenses = {}
+        self._meta = {"last_id": 0, "rollup": {}}
+        self._fingerprint = None
+        self.loaded = False
+
+    def load(self):
+        """
+        Loads every expense from the backend and aggregates the rollup in memory.
+        """
+        self._expenses = {expense["ID"]: expense for expense in self.backend.iter_expenses()}
+        self._meta = {"last_id": self.backend.next_id() - 1, "rollup": {}}
+        for expense in self._expenses.values():
+            _apply_to_meta(self._meta, expense)
+        self._fingerprint = self.backend.fingerprint()
+        self.loaded = True
+
+    def refresh(self) -> bool:
+        """
+        Loads the ledger again if it was never loaded or changed outside the shell.
+
+        Returns:
+            bool: True if the ledger was (re)loaded.
+        """
+        if self.loaded and self.backend.fingerprint() == self._fingerprint:
+            return False
+        self.load()
+        return True
+
+    def __len__(self):
+        return len(self._expenses)
+
+    # Reads, served from memory
+
+    def initialize(self):
+        self.backend.initialize()
+
+    def iter_expenses(self):
+        return iter(list(self._expenses.values()))
+
+    def fingerprint(self):
+        return self.backend.fingerprint()
+
+    def snapshot(self):
+        return self.backend.snapshot()
+
+    def catch_up(self, meta) -> bool:
+        return self.backend.catch_up(meta)
+
+    def find(self, expense_id: int):
+        self.refresh()
+        expense = self._expenses.get(str(expense_id))
+        return dict(expense) if expense is not None else None
+
+    def rollup(self):
+        # Aggregated from the backend's files, since it's what rebuilds the metadata; the
+        # totals in memory are replaced with the result
+        last_id, rollup = self.backend.rollup()
+        self._meta = _copy_meta({"last_id": max(self._meta["last_id"], last_id), "rollup": rollup})
+        return last_id, rollup
+
+    def next_id(self) -> int:
+        self.refresh()
+        return self._meta["last_id"] + 1
+
+    def monthly_totals(self):
+        return {
+            month_key: sum(total for total, _ in categories.values()) / 100
+            for month_key, categories in self._meta["rollup"].items()
+        }
+
+    def summarize(self, target_year=None, target_month=None, target_category=None):
+        return _summarize_rollup(self._meta["rollup"], target_year, target_month, target_category)
+
+    # Writes, applied to the backend and then to memory
+
+    def _append(self, expenses):
+        self.refresh()
+        self.backend._append(expenses)
+        for expense in expenses:
+            expense = dict(expense)
+            self._expenses[expense["ID"]] = expense
+            _apply_to_meta(self._meta, expense)
+        self._fingerprint = self.backend.fingerprint()
+
+    def _update(self, expense):
+        self.refresh()
+        self.backend._update(expense)
+        expense = dict(expense)
+        record_expense_change(self._meta, old_expense=self._expenses.get(expense["ID"]), new_expense=expense)
+        self._expenses[expense["ID"]] = expense
+        self._fingerprint = self.backend.fingerprint()
+
+    def _delete(self, expense_id: int):
+        self.refresh()
+        self.backend._delete(expense_id)
+        record_expense_change(self._meta, old_expense=self._expenses.pop(str(expense_id), None))
+        self._fingerprint = self.backend.fingerprint()
+
+    def _clear(self):
+        self.backend._clear()
+        self._expenses = {}
+        self._meta["rollup"] = {}
+        self._fingerprint = self.backend.fingerprint()
+
+    def _compact(self) -> int:
+        compacted = self.backend._compact()
+        self._fingerprint = self.backend.fingerprint()
+        return compacted
+
+    def remove(self):
+        self.backend.remove()
+        self._expenses = {}
+        self._meta["rollup"] = {}
+        self.loaded = False
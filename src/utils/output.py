@@ -0,0 +1,75 @@
+import os
+import sys
+import json
+import click
+
+
+OUTPUT_FORMATS = ["table", "tsv", "json", "ndjson"]
+
+# Records written to the stream per write call
+WRITE_BATCH_RECORDS = 1000
+
+
+def get_output_format() -> str:
+    """
+    Returns the output format chosen with the CLI's global --format option ("table" by default).
+    """
+    ctx = click.get_current_context(silent=True)
+    if ctx is None:
+        return "table"
+    return ctx.find_root().params.get("output_format") or "table"
+
+
+def _tsv_field(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    # Backslash escapes, so every record stays on one line with one tab between fields
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _format_lines(fieldnames, rows, output_format):
+    if output_format == "tsv":
+        yield "\t".join(fieldnames) + "\n"
+        for row in rows:
+            yield "\t".join(map(_tsv_field, row)) + "\n"
+    elif output_format == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(fieldnames, row)), ensure_ascii=False) + "\n"
+    else:
+        separator = "[\n"
+        for row in rows:
+            yield separator + "  " + json.dumps(dict(zip(fieldnames, row)), ensure_ascii=False)
+            separator = ",\n"
+        yield "[]\n" if separator == "[\n" else "\n]\n"
+
+
+def write_records(fieldnames, rows, output_format: str, stream=None):
+    """
+    Writes records as plain text, without rich: tab-separated values with a header line
+    (tabs, line breaks and backslashes escaped with a backslash), a JSON array of objects,
+    or one JSON object per line. Records are streamed in batches, so memory use doesn't
+    grow with the number of records.
+
+    Args:
+        fieldnames (list): The field names, in the order of the values in each row.
+        rows: Iterable of tuples of values (strings, numbers or None).
+        output_format (str): "tsv", "json" or "ndjson".
+        stream (optional): Text stream to write to. Defaults to stdout.
+    """
+    stream = stream or sys.stdout
+    batch = []
+    try:
+        for line in _format_lines(fieldnames, rows, output_format):
+            batch.append(line)
+            if len(batch) >= WRITE_BATCH_RECORDS:
+                stream.write("".join(batch))
+                batch.clear()
+        stream.write("".join(batch))
+        stream.flush()
+    except BrokenPipeError:
+        # The reader stopped early (e.g., '| head'): point stdout at devnull so exiting doesn't fail again
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        sys.exit(1)
@@ -0,0 +1,156 @@
+import os
+import re
+import csv
+import mmap
+from concurrent.futures import ProcessPoolExecutor
+from utils.data_manager import FIELD_NAMES, _apply_to_meta
+from utils.fast_scan import scan_rollup
+
+
+# Smaller files are aggregated in the calling process: starting the workers costs more than the scan
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024
+
+# Each worker gets a few chunks, so a slow chunk doesn't leave the other workers idle
+CHUNKS_PER_WORKER = 4
+
+# A line that looks like the start of a record: an ID and a date. A quoted description can
+# span lines that look like this too, so split points are also checked to be outside quotes
+RECORD_START = re.compile(rb"\n\d+,\d{4}-\d{2}-\d{2},")
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def _count_quotes(data, start: int, end: int, block_size: int = 1024 * 1024) -> int:
+    # Counted a block at a time, so a long range isn't copied out of the map at once
+    return sum(data[offset:min(offset + block_size, end)].count(b'"') for offset in range(start, end, block_size))
+
+
+def _next_record_start(data, previous: int, position: int):
+    """
+    Returns the offset of the first record that starts after position, or None.
+
+    previous is the start of an earlier record: a line is only taken as a record start if
+    the number of quotes since then is even, so it isn't inside a quoted field.
+    """
+    checked, quotes = previous, 0
+    search_from = position - 1
+    while True:
+        match = RECORD_START.search(data, search_from)
+        if match is None:
+            return None
+        boundary = match.start() + 1
+        quotes += _count_quotes(data, checked, boundary)
+        checked = boundary
+        if quotes % 2 == 0:
+            return boundary
+        search_from = boundary
+
+
+def split_ranges(path, parts: int):
+    """
+    Splits a CSV file into byte ranges that start and end at record boundaries,
+    skipping the header line.
+
+    Returns:
+        tuple: (fieldnames, ranges) where ranges is a list of (start, end) offsets.
+    """
+    with path.open("rb") as file:
+        header = file.readline()
+        size = os.fstat(file.fileno()).st_size
+        start = len(header)
+
+        boundaries = [start]
+        if parts > 1 and size > start:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                for part in range(1, parts):
+                    position = start + (size - start) * part // parts
+                    if position <= boundaries[-1]:
+                        continue
+                    boundary = _next_record_start(data, boundaries[-1], position)
+                    if boundary is None:
+                        break
+                    boundaries.append(boundary)
+        boundaries.append(size)
+
+    fieldnames = next(csv.reader([header.decode("utf-8")]), [])
+    return fieldnames, [(first, last) for first, last in zip(boundaries, boundaries[1:]) if last > first]
+
+
+def _read_lines(path, start: int, end: int):
+    with path.open("rb") as file:
+        file.seek(start)
+        for line in file:
+            yield line.decode("utf-8")
+            start += len(line)
+            if start >= end:
+                return
+
+
+def rollup_range(path, start: int, end: int, fieldnames, changes):
+    """
+    Aggregates the records in a byte range of a CSV file by month and category, the
+    same way the serial scan does: rows changed in the journal are replaced by their
+    new version, and deleted rows are skipped. Runs in a worker process.
+
+    Returns:
+        dict: Ledger metadata with "last_id" and "rollup" for the range.
+    """
+    if fieldnames == FIELD_NAMES:
+        return scan_rollup(path, changes, start, end)
+
+    # A file with its columns in another order is read with the CSV parser
+    meta = {"last_id": 0, "rollup": {}}
+    for row in csv.DictReader(_read_lines(path, start, end), fieldnames=fieldnames):
+        if row["ID"] in changes:
+            row = changes[row["ID"]]
+            if row is None:
+                continue
+        _apply_to_meta(meta, row)
+    return meta
+
+
+def merge_rollups(meta, part):
+    """
+    Adds the metadata of a later range into meta. Categories keep the order in which
+    they first appear in the file, as in the serial scan.
+    """
+    meta["last_id"] = max(meta["last_id"], part["last_id"])
+    for month_key, categories in part["rollup"].items():
+        month_rollup = meta["rollup"].setdefault(month_key, {})
+        for category, (cents, count) in categories.items():
+            total, total_count = month_rollup.get(category, (0, 0))
+            month_rollup[category] = [total + cents, total_count + count]
+
+
+def parallel_rollup(path, changes=None, workers: int = None):
+    """
+    Aggregates a CSV ledger by month and category in a pool of worker processes. The file
+    is split into byte ranges at record boundaries, each range is aggregated by a worker,
+    and the partial rollups are merged in file order. The result is the same as a serial
+    scan of the file.
+
+    Args:
+        path (Path): The CSV file.
+        changes (dict, optional): The journal: ID -> new row, or None for deleted rows.
+        workers (int, optional): Number of worker processes. Defaults to the number of CPUs.
+
+    Returns:
+        tuple: (highest ID, rollup) where the rollup maps "YYYY-MM" to {category: [cents, count]}.
+    """
+    workers = workers or default_workers()
+    changes = changes or {}
+    fieldnames, ranges = split_ranges(path, workers * CHUNKS_PER_WORKER if workers > 1 else 1)
+
+    meta = {"last_id": 0, "rollup": {}}
+    if len(ranges) < 2:
+        for start, end in ranges:
+            merge_rollups(meta, rollup_range(path, start, end, fieldnames, changes))
+        return meta["last_id"], meta["rollup"]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(rollup_range, path, start, end, fieldnames, changes) for start, end in ranges]
+        for future in futures:
+            merge_rollups(meta, future.result())
+    return meta["last_id"], meta["rollup"]
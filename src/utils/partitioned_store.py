@@ -0,0 +1,154 @@
+from itertools import chain
+from utils.data_manager import DATA_DIR, ExpenseStorage, CsvStorage, get_partition_scheme, _read_journal
+
+
+PARTITIONS_DIR = DATA_DIR / "partitions"
+PARTITION_PREFIX = "expenses_"
+
+# Length of the partition key taken from the 'YYYY-MM-DD' date
+PARTITION_KEY_LENGTHS = {"year": 4, "month": 7}
+
+
+class PartitionedStorage(ExpenseStorage):
+    """
+    Storage backend that splits the ledger into one CSV file per year (or per month) in
+    data/partitions (e.g., expenses_2025.csv). Each partition is a regular CSV storage with
+    its own journal and indexes, and queries only open the partitions that their date
+    range can touch.
+
+    Expenses are read partition by partition, so they come out in date-of-partition order
+    and in ID order within each partition.
+    """
+
+    name = "partitioned"
+
+    def __init__(self, directory=PARTITIONS_DIR, scheme=None):
+        self.directory = directory
+        self.scheme = scheme or get_partition_scheme()
+        self.key_length = PARTITION_KEY_LENGTHS[self.scheme]
+        self._partitions = {}
+
+    def partition(self, key: str) -> CsvStorage:
+        if key not in self._partitions:
+            self._partitions[key] = CsvStorage(self.directory / f"{PARTITION_PREFIX}{key}.csv")
+        return self._partitions[key]
+
+    def partition_keys(self):
+        """
+        Returns the keys of the existing partitions ('YYYY' or 'YYYY-MM'), sorted.
+        """
+        keys = []
+        for path in self.directory.glob(f"{PARTITION_PREFIX}*.csv"):
+            key = path.stem[len(PARTITION_PREFIX):]
+            if len(key) == self.key_length:
+                keys.append(key)
+        return sorted(keys)
+
+    def partition_key(self, expense) -> str:
+        return expense["Date"][:self.key_length]
+
+    def _partitions_between(self, start_date=None, end_date=None):
+        """
+        Returns the partitions whose period overlaps a date range (ISO dates, both optional).
+        """
+        return [
+            self.partition(key)
+            for key in self.partition_keys()
+            if not (start_date and key < start_date[:self.key_length])
+            and not (end_date and key > end_date[:self.key_length])
+        ]
+
+    def _owner(self, expense_id: int):
+        """
+        Returns the partition that holds an expense, or None. Recent partitions are checked first.
+        """
+        for key in reversed(self.partition_keys()):
+            if self.partition(key).find(expense_id) is not None:
+                return self.partition(key)
+        return None
+
+    def initialize(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def iter_expenses(self):
+        return chain.from_iterable(partition.iter_expenses() for partition in self._partitions_between())
+
+    def fingerprint(self):
+        if not self.directory.exists():
+            return None
+        fingerprint = []
+        for key in self.partition_keys():
+            fingerprint += [key, *(self.partition(key).fingerprint() or [])]
+        return fingerprint
+
+    def rollup(self):
+        # Each partition is scanned from its raw bytes, and the partial rollups are merged in order
+        from utils.parallel_scan import merge_rollups
+        meta = {"last_id": 0, "rollup": {}}
+        for partition in self._partitions_between():
+            last_id, rollup = partition.rollup()
+            merge_rollups(meta, {"last_id": last_id, "rollup": rollup})
+        return meta["last_id"], meta["rollup"]
+
+    def find(self, expense_id: int):
+        owner = self._owner(expense_id)
+        return owner.find(expense_id) if owner is not None else None
+
+    def query(self, query):
+        partitions = self._partitions_between(query.start_date, query.end_date)
+        return chain.from_iterable(partition.query(query) for partition in partitions)
+
+    def query_records(self, query):
+        partitions = self._partitions_between(query.start_date, query.end_date)
+        return chain.from_iterable(partition.query_records(query) for partition in partitions)
+
+    def _append(self, expenses):
+        groups = {}
+        for expense in expenses:
+            groups.setdefault(self.partition_key(expense), []).append(expense)
+
+        self.initialize()
+        for key, group in groups.items():
+            partition = self.partition(key)
+            partition.initialize()
+            partition._append(group)
+
+    def _update(self, expense):
+        owner = self._owner(int(expense["ID"]))
+        target = self.partition(self.partition_key(expense))
+        if owner is target:
+            owner._update(expense)
+            return
+
+        # The new date belongs to another partition: move the expense
+        if owner is not None:
+            owner._delete(int(expense["ID"]))
+        target.initialize()
+        if str(expense["ID"]) in _read_journal(target.journal_path):
+            # Moved back to a partition it left: its row is still there, behind a deletion in the journal
+            target._update(expense)
+        else:
+            target._insert(expense)
+
+    def _delete(self, expense_id: int):
+        owner = self._owner(expense_id)
+        if owner is not None:
+            owner._delete(expense_id)
+
+    def _clear(self):
+        self.remove()
+        self.initialize()
+
+    def _compact(self) -> int:
+        return sum(self.partition(key)._compact() for key in self.partition_keys())
+
+    def remove(self):
+        # Only the partitions of this scheme, so a ledger can be split again by another
+        # scheme in the same directory
+        for key in self.partition_keys():
+            self.partition(key).remove()
+        self._partitions = {}
+        try:
+            self.directory.rmdir()
+        except OSError:
+            pass
@@ -0,0 +1,142 @@
+import math
+import calendar
+from datetime import date
+
+
+def period_bounds(year: int, month: int = None):
+    """
+    Returns the first and last dates ('YYYY-MM-DD') of a year, or of a month within it.
+    """
+    if month:
+        last_day = calendar.monthrange(year, month)[1]
+        return f"{year:04d}-{month:02d}-01", f"{year:04d}-{month:02d}-{last_day:02d}"
+    return f"{year:04d}-01-01", f"{year:04d}-12-31"
+
+
+class ExpenseQuery:
+    """
+    Filters for a scan over the ledger, shared by list, summary and export.
+
+    A year (and optionally a month) narrows the date range. Categories match
+    case-insensitively, and both ends of the date and amount ranges are inclusive.
+    """
+
+    def __init__(self, category=None, start_date=None, end_date=None, min_amount=None, max_amount=None, year=None, month=None):
+        if year:
+            period_start, period_end = period_bounds(year, month)
+            start_date = max(start_date, period_start) if start_date else period_start
+            end_date = min(end_date, period_end) if end_date else period_end
+
+        self.category = category.strip().lower() if category else None
+        self.start_date = start_date
+        self.end_date = end_date
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_cents = round(min_amount * 100) if min_amount is not None else None
+        self.max_cents = round(max_amount * 100) if max_amount is not None else None
+
+    @property
+    def filters(self):
+        """The filters as keyword arguments, for backends that push them down to their own format."""
+        return {
+            "category": self.category,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "min_amount": self.min_amount,
+            "max_amount": self.max_amount,
+        }
+
+    @property
+    def is_empty(self) -> bool:
+        return not any(value is not None for value in self.filters.values())
+
+    def matches_raw(self, row) -> bool:
+        """
+        Checks the filters that only need the raw strings: the date range (ISO dates compare
+        as strings) and the category. No number or date is parsed.
+        """
+        return self.matches_fields(row["Date"], row["Category"])
+
+    def matches_fields(self, expense_date: str, category: str) -> bool:
+        """
+        Same as matches_raw, for callers that read the fields without building a dictionary.
+        """
+        if self.start_date and not expense_date >= self.start_date:
+            return False
+        if self.end_date and not expense_date <= self.end_date:
+            return False
+        if self.category and category.strip().lower() != self.category:
+            return False
+        return True
+
+    def matches_amount(self, row) -> bool:
+        """
+        Checks the amount range. Only parses the amount when there is a range to check.
+        """
+        if self.min_amount is None and self.max_amount is None:
+            return True
+        amount = float(row["Amount"])
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        return True
+
+    def matches_cents(self, cents: int) -> bool:
+        """
+        Checks the amount range against an amount already decoded to integer cents.
+        """
+        if self.min_cents is not None and cents < self.min_cents:
+            return False
+        if self.max_cents is not None and cents > self.max_cents:
+            return False
+        return True
+
+    def matches(self, row) -> bool:
+        return self.matches_raw(row) and self.matches_amount(row)
+
+
+def is_valid_row(row) -> bool:
+    """
+    Checks that a row has a valid 'YYYY-MM-DD' date and a finite numeric amount
+    ('inf' or '1e400' can't be converted to cents).
+    """
+    expense_date = row["Date"]
+    if len(expense_date) != 10 or expense_date[4] != "-" or expense_date[7] != "-":
+        return False
+    try:
+        date.fromisoformat(expense_date)
+        return math.isfinite(float(row["Amount"]))
+    except (ValueError, TypeError):
+        return False
+
+
+def scan(rows, query: ExpenseQuery, on_invalid=None):
+    """
+    Streams the rows that match a query. Rows are rejected on the raw date string and
+    category first; only the remaining ones have their amount and date parsed.
+    Rows with an invalid date or amount are skipped.
+
+    Args:
+        rows: Iterable of expense dictionaries.
+        query (ExpenseQuery): The filters to apply.
+        on_invalid (callable, optional): Called with each skipped invalid row.
+
+    Yields:
+        dict: The matching rows, in input order.
+    """
+    for row in rows:
+        try:
+            if not query.matches_raw(row):
+                continue
+            valid = is_valid_row(row)
+        except (TypeError, AttributeError):
+            valid = False
+
+        if not valid:
+            if on_invalid is not None:
+                on_invalid(row)
+            continue
+
+        if query.matches_amount(row):
+            yield row
@@ -0,0 +1,91 @@
+import sys
+from datetime import date
+
+
+_date_cache = {}
+
+
+def parse_date(date_str: str) -> date:
+    """
+    Parses a 'YYYY-MM-DD' string, reusing the same date object for repeated dates.
+    Raises ValueError for any other format.
+    """
+    parsed = _date_cache.get(date_str)
+    if parsed is None:
+        if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+            raise ValueError(f"Invalid date: {date_str!r}")
+        parsed = _date_cache[date_str] = date.fromisoformat(date_str)
+    return parsed
+
+
+def format_cents(cents: int) -> str:
+    """
+    Formats an integer number of cents as an amount string (e.g., 1050 -> '10.50').
+    """
+    sign = "-" if cents < 0 else ""
+    cents = abs(cents)
+    return f"{sign}{cents // 100}.{cents % 100:02d}"
+
+
+class Expense:
+    """
+    A typed, compact expense record decoded once at load: integer ID, date object,
+    amount in integer cents and an interned category string.
+    """
+
+    __slots__ = ("id", "date", "cents", "category", "description")
+
+    def __init__(self, id: int, date: date, cents: int, category: str, description: str):
+        self.id = id
+        self.date = date
+        self.cents = cents
+        self.category = sys.intern(category)
+        self.description = description
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Decodes a dictionary of strings (as stored in the CSV file) into a record.
+        Raises ValueError if the ID, date or amount are invalid.
+        """
+        return cls(
+            int(row["ID"]),
+            parse_date(row["Date"]),
+            round(float(row["Amount"]) * 100),
+            row["Category"],
+            row["Description"],
+        )
+
+    def to_row(self):
+        """
+        Encodes the record back into the dictionary of strings used by the storage backends.
+        """
+        return {
+            "ID": str(self.id),
+            "Date": self.date.isoformat(),
+            "Amount": format_cents(self.cents),
+            "Category": self.category,
+            "Description": self.description,
+        }
+
+    @property
+    def amount(self) -> float:
+        return self.cents / 100
+
+    def copy(self):
+        return Expense(self.id, self.date, self.cents, self.category, self.description)
+
+    def __eq__(self, other):
+        if not isinstance(other, Expense):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"Expense(id={self.id}, date={self.date.isoformat()}, amount={format_cents(self.cents)}, category={self.category!r})"
+
+
+def as_row(expense):
+    """
+    Returns the dictionary of strings for an expense given either as a record or as a dictionary.
+    """
+    return expense.to_row() if isinstance(expense, Expense) else expense
@@ -0,0 +1,103 @@
+import heapq
+import pickle
+import tempfile
+from datetime import date
+from itertools import islice
+from utils.records import Expense
+
+
+# Sort keys for Expense records. The ID breaks ties, so every order is total and repeatable
+SORT_KEYS = {
+    "date": lambda record: (record.date, record.id),
+    "amount": lambda record: (record.cents, record.id),
+    "category": lambda record: (record.category.lower(), record.id),
+    "id": lambda record: record.id,
+}
+
+# Records sorted in memory at most. Larger results are sorted in runs of this size that are
+# spilled to temporary files and merged
+SORT_MEMORY_RECORDS = 250_000
+
+
+def _write_run(records):
+    """
+    Writes sorted records to a temporary file and returns it, positioned at the start.
+    """
+    run = tempfile.TemporaryFile()
+    pickler = pickle.Pickler(run, protocol=pickle.HIGHEST_PROTOCOL)
+    for record in records:
+        pickler.dump((record.id, record.date.toordinal(), record.cents, record.category, record.description))
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    unpickler = pickle.Unpickler(run)
+    while True:
+        try:
+            expense_id, ordinal, cents, category, description = unpickler.load()
+        except EOFError:
+            return
+        yield Expense(expense_id, date.fromordinal(ordinal), cents, category, description)
+
+
+def external_sort(records, key, descending: bool = False, memory_records: int = SORT_MEMORY_RECORDS):
+    """
+    Sorts records that may not fit in memory. Up to memory_records records are sorted in
+    memory; beyond that, sorted runs of that size are written to temporary files and
+    merged, so memory use stays bounded by the run size.
+
+    Yields:
+        Expense: The records, in order.
+    """
+    records = iter(records)
+    runs = []
+    try:
+        while True:
+            chunk = sorted(islice(records, memory_records), key=key, reverse=descending)
+            if not runs and len(chunk) < memory_records:
+                # Everything fit in memory
+                yield from chunk
+                return
+            if not chunk:
+                break
+            runs.append(_write_run(chunk))
+            del chunk
+
+        yield from heapq.merge(*(_read_run(run) for run in runs), key=key, reverse=descending)
+    finally:
+        for run in runs:
+            run.close()
+
+
+def sort_records(records, sort_by: str = None, descending: bool = False, limit: int = None, offset: int = 0,
+                 memory_records: int = SORT_MEMORY_RECORDS):
+    """
+    Sorts and pages a stream of Expense records.
+
+    Without a sort key the records keep their storage order and are streamed through
+    (or are sorted by ID, if descending).
+    With a limit, only the first offset + limit records in order are kept, in a bounded
+    heap (O(n log k)). Full sorts go through external_sort.
+
+    Args:
+        records: Iterable of Expense records.
+        sort_by (str, optional): A key of SORT_KEYS. Defaults to storage order.
+        descending (bool, optional): Reverse the order. Defaults to False.
+        limit (int, optional): Maximum number of records to return. Defaults to all.
+        offset (int, optional): Number of records to skip first. Defaults to 0.
+        memory_records (int, optional): Records sorted in memory before spilling to disk.
+
+    Returns:
+        iterator: The records of the page, in order.
+    """
+    stop = offset + limit if limit is not None else None
+    if sort_by is None and not descending:
+        return islice(records, offset, stop)
+
+    # Descending without a key is newest first, by ID
+    key = SORT_KEYS[sort_by or "id"]
+    if stop is not None and stop <= memory_records:
+        select = heapq.nlargest if descending else heapq.nsmallest
+        return islice(select(stop, records, key=key), offset, None)
+    return islice(external_sort(records, key, descending, memory_records), offset, stop)
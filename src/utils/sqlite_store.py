@@ -0,0 +1,204 @@
+import sqlite3
+from collections import defaultdict
+from utils.data_manager import DATA_DIR, ExpenseStorage
+from utils.ledger_index import file_stamp
+from utils.query_engine import period_bounds
+from utils.records import Expense, parse_date
+
+
+SQLITE_FILE_PATH = DATA_DIR / "expenses.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses (date);
+CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses (category COLLATE NOCASE, date);
+CREATE INDEX IF NOT EXISTS idx_expenses_amount ON expenses (amount_cents);
+"""
+
+
+def _row_to_expense(row):
+    """
+    Converts a database row into the same dictionary of strings returned by the CSV reader.
+    """
+    expense_id, expense_date, cents, category, description = row
+    return {
+        "ID": str(expense_id),
+        "Date": expense_date,
+        "Amount": f"{cents // 100}.{cents % 100:02d}",
+        "Category": category,
+        "Description": description,
+    }
+
+
+def _expense_to_row(expense):
+    return (
+        int(expense["ID"]),
+        expense["Date"],
+        round(float(expense["Amount"]) * 100),
+        expense["Category"],
+        expense["Description"],
+    )
+
+
+def _where_clause(category=None, start_date=None, end_date=None, min_amount=None, max_amount=None):
+    """
+    Builds the WHERE clause and parameters for the query filters.
+    """
+    conditions, params = [], []
+    if category:
+        conditions.append("category = ? COLLATE NOCASE")
+        params.append(category.strip())
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    if min_amount is not None:
+        conditions.append("amount_cents >= ?")
+        params.append(round(min_amount * 100))
+    if max_amount is not None:
+        conditions.append("amount_cents <= ?")
+        params.append(round(max_amount * 100))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+class SqliteStorage(ExpenseStorage):
+    """
+    Storage backend for a SQLite database in WAL mode (data/expenses.db), with indexes on
+    date, category and amount. Filters and aggregations run as queries, so this backend
+    doesn't need the rollup.
+    """
+
+    name = "sqlite"
+    maintains_rollup = False
+
+    def __init__(self, path=SQLITE_FILE_PATH):
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self.path.parent.mkdir(exist_ok=True)
+            self._connection = sqlite3.connect(self.path)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def initialize(self):
+        self.connection
+
+    def iter_expenses(self):
+        if not self.path.exists():
+            return iter(())
+        return self.query()
+
+    def fingerprint(self):
+        # Commits land in the write-ahead log until a checkpoint moves them to the database file
+        if not self.path.exists():
+            return None
+        return [*file_stamp(self.path), *file_stamp(self.path.with_name(f"{self.path.name}-wal"))]
+
+    def find(self, expense_id: int):
+        row = self.connection.execute(
+            "SELECT id, date, amount_cents, category, description FROM expenses WHERE id = ?", (expense_id,)
+        ).fetchone()
+        return _row_to_expense(row) if row else None
+
+    def query(self, query=None):
+        where, params = _where_clause(**query.filters) if query else ("", [])
+        cursor = self.connection.execute(
+            f"SELECT id, date, amount_cents, category, description FROM expenses{where} ORDER BY id", params
+        )
+        return map(_row_to_expense, cursor)
+
+    def query_records(self, query):
+        where, params = _where_clause(**query.filters)
+        cursor = self.connection.execute(
+            f"SELECT id, date, amount_cents, category, description FROM expenses{where} ORDER BY id", params
+        )
+        for expense_id, expense_date, cents, category, description in cursor:
+            yield Expense(expense_id, parse_date(expense_date), cents, category, description)
+
+    def rollup(self):
+        rollup = {}
+        rows = self.connection.execute(
+            "SELECT substr(date, 1, 7), category, SUM(amount_cents), COUNT(*) FROM expenses GROUP BY 1, 2 ORDER BY 1"
+        )
+        for month_key, category, total, count in rows:
+            month_rollup = rollup.setdefault(month_key, {})
+            category_total, category_count = month_rollup.get(category.capitalize(), (0, 0))
+            month_rollup[category.capitalize()] = [category_total + total, category_count + count]
+        return self.next_id() - 1, rollup
+
+    def next_id(self) -> int:
+        # AUTOINCREMENT keeps the highest ID ever used, so deleted IDs aren't reused
+        row = self.connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'expenses'").fetchone()
+        return (row[0] if row else 0) + 1
+
+    def reserve_ids(self, last_id: int):
+        # Rows inserted with explicit IDs only raise the sequence to the highest of them
+        if self.next_id() > last_id:
+            return
+        with self.connection:
+            updated = self.connection.execute("UPDATE sqlite_sequence SET seq = ? WHERE name = 'expenses'", (last_id,))
+            if updated.rowcount == 0:
+                self.connection.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('expenses', ?)", (last_id,))
+
+    def monthly_totals(self):
+        rows = self.connection.execute("SELECT substr(date, 1, 7), SUM(amount_cents) FROM expenses GROUP BY 1")
+        return {month_key: total / 100 for month_key, total in rows}
+
+    def summarize(self, target_year=None, target_month=None, target_category=None):
+        total_cents = self.connection.execute("SELECT COALESCE(SUM(amount_cents), 0) FROM expenses").fetchone()[0]
+
+        start_date = end_date = None
+        if target_year:
+            start_date, end_date = period_bounds(target_year, target_month)
+        where, params = _where_clause(category=target_category, start_date=start_date, end_date=end_date)
+        rows = self.connection.execute(
+            f"SELECT category, SUM(amount_cents) FROM expenses{where} GROUP BY category ORDER BY MIN(id)", params
+        )
+
+        category_summary = defaultdict(float)
+        for category, cents in rows:
+            category_summary[category.capitalize()] += cents / 100
+        return total_cents / 100, sum(category_summary.values()), category_summary
+
+    def _append(self, expenses):
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO expenses (id, date, amount_cents, category, description) VALUES (?, ?, ?, ?, ?)",
+                map(_expense_to_row, expenses),
+            )
+
+    def _update(self, expense):
+        expense_id, expense_date, cents, category, description = _expense_to_row(expense)
+        with self.connection:
+            self.connection.execute(
+                "UPDATE expenses SET date = ?, amount_cents = ?, category = ?, description = ? WHERE id = ?",
+                (expense_date, cents, category, description, expense_id),
+            )
+
+    def _delete(self, expense_id: int):
+        with self.connection:
+            self.connection.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+
+    def _clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM expenses")
+
+    def remove(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        for suffix in ["", "-wal", "-shm"]:
+            self.path.with_name(self.path.name + suffix).unlink(missing_ok=True)